@@ -0,0 +1,59 @@
+# bench_corpus_load.py - 语料加载基准测试：json.load + json_normalize vs 列式存储内存映射
+# 用法: python bench_corpus_load.py [语料复制倍数]
+# 每种方式在独立子进程中运行，报告加载耗时与进程峰值内存（仅支持 Linux/macOS）
+
+import os
+import sys
+import json
+import subprocess
+import tempfile
+
+from corpus_store import CORPUS_JSON, read_json_corpus, write_corpus_store
+
+CHILD_SCRIPT = r'''
+import sys, time, resource
+import pandas, numpy
+import corpus_store
+
+def peak_rss():
+    # Linux 下 ru_maxrss 会跨 exec 继承父进程的峰值，优先读取 /proc 中的 VmHWM
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+baseline = peak_rss()
+start = time.perf_counter()
+if sys.argv[1] == 'json':
+    df = corpus_store.read_json_corpus(sys.argv[2])
+else:
+    df, bodies = corpus_store.load_corpus_store(sys.argv[2], sys.argv[3])
+elapsed = time.perf_counter() - start
+print(len(df), elapsed, baseline, peak_rss())
+'''
+
+repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    json_path = CORPUS_JSON
+    if repeat > 1:
+        with open(CORPUS_JSON, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        json_path = os.path.join(tmp_dir, 'corpus.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data * repeat, f, ensure_ascii=False)
+    store_dir = os.path.join(tmp_dir, 'store')
+    write_corpus_store(read_json_corpus(json_path), json_path, store_dir)
+
+    print(f"--- 语料文件 {os.path.getsize(json_path) / 2**20:.1f} MB ---")
+    print(f"{'方式':<10} {'行数':>8} {'耗时(s)':>10} {'加载增量RSS(MB)':>16} {'峰值RSS(MB)':>12}")
+    for mode in ['json', 'columnar']:
+        out = subprocess.run([sys.executable, '-c', CHILD_SCRIPT, mode, json_path, store_dir],
+                             capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        rows, elapsed, baseline, peak = out.stdout.split()
+        print(f"{mode:<12} {rows:>8} {float(elapsed):>12.3f} {(int(peak) - int(baseline)) / 2**20:>18.1f} "
+              f"{int(peak) / 2**20:>14.1f}")
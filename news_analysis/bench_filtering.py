@@ -0,0 +1,57 @@
+# bench_filtering.py - 日期/主题过滤基准测试：布尔掩码 vs 有序索引二分查找
+# 用法: python bench_filtering.py [每种规模的查询次数]
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from news_store import NewsStore
+from preprocess import TokenizedCorpus
+
+TOPICS = ["人才培养", "基础科研", "技术创新"]
+SIZES = [10_000, 100_000, 1_000_000]
+queries = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+
+def make_corpus(n, rng):
+    start = pd.Timestamp('2024-05-24').value
+    end = pd.Timestamp('2025-07-09').value
+    return pd.DataFrame({
+        'time': pd.to_datetime(rng.integers(start, end, n)),
+        'topic_name': rng.choice(TOPICS, n),
+        'probability': rng.random(n).astype(np.float32),
+    })
+
+
+def mask_filter(df, start_date, end_date, topic):
+    """仪表盘原有的过滤方式。"""
+    dff = df[(df['time'] >= start_date) & (df['time'] <= end_date)]
+    if topic:
+        dff = dff[dff['topic_name'] == topic]
+    return dff
+
+
+def run(fn, windows):
+    start = time.perf_counter()
+    for start_date, end_date, topic in windows:
+        fn(start_date, end_date, topic)
+    return (time.perf_counter() - start) / len(windows) * 1000
+
+
+rng = np.random.default_rng(0)
+print(f"{'行数':>10} {'掩码(ms)':>10} {'二分(ms)':>10} {'加速比':>8}")
+for n in SIZES:
+    df = make_corpus(n, rng)
+    empty_corpus = TokenizedCorpus([], np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int32), None)
+    store = NewsStore(df, TOPICS, empty_corpus)
+    days = pd.date_range('2024-05-24', '2025-07-09', freq='D')
+    windows = []
+    for _ in range(queries):
+        a, b = sorted(rng.choice(len(days), 2, replace=False))
+        topic = rng.choice([None] + TOPICS)
+        windows.append((days[a].strftime('%Y-%m-%d'), days[b].strftime('%Y-%m-%d'), topic))
+    mask_ms = run(lambda s, e, t: mask_filter(df, s, e, t), windows)
+    index_ms = run(store.select, windows)
+    print(f"{n:>12} {mask_ms:>12.3f} {index_ms:>12.3f} {mask_ms / index_ms:>10.1f}x")
@@ -0,0 +1,103 @@
+# bench_fonts.py - 字体查找与词云渲染基准测试：matplotlib 查找 vs 缓存的字体路径，逐次打开字体 vs 复用字体对象
+# 用法: python bench_fonts.py [每种方式的渲染轮数]
+#
+# 启动耗时在独立的子进程中测量（含导入模块的时间），"冷" 指 matplotlib 没有字体缓存、需要扫描系统字体重建的情形。
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+import pandas as pd
+from PIL import ImageFont
+
+import fonts
+import wordcloud_render
+from corpus_store import load_corpus
+from preprocess import tokenize_corpus
+from news_store import NewsStore
+
+TOPIC_MAP = {1: "人才培养", 2: "基础科研", 3: "技术创新"}
+rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+
+SEARCH_SCRIPT = """
+import time
+start = time.perf_counter()
+import fonts
+fonts.search_font()
+print(time.perf_counter() - start)
+"""
+CACHED_SCRIPT = """
+import time
+start = time.perf_counter()
+import fonts
+fonts.find_font(cache_path=CACHE_PATH)
+print(time.perf_counter() - start)
+"""
+
+
+def startup_seconds(script, env=None):
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, **(env or {}))).stdout
+    return float(output.split()[-1])
+
+
+# ========================= 1. 字体查找 =========================
+# 缓存写入临时文件：本机没有候选中文字体、退回默认字体时 find_font 不会写 cache/font.json
+with tempfile.TemporaryDirectory() as tmp_dir:
+    family, path, _ = fonts.search_font()
+    cache_path = os.path.join(tmp_dir, 'font.json')
+    fonts._save_cached_font(fonts.FONT_PREFERENCES, family, path, cache_path)
+    cold = startup_seconds(SEARCH_SCRIPT, {'MPLCONFIGDIR': os.path.join(tmp_dir, 'matplotlib')})
+    warm = min(startup_seconds(SEARCH_SCRIPT) for _ in range(3))
+    cached = min(startup_seconds(f"CACHE_PATH = {cache_path!r}" + CACHED_SCRIPT) for _ in range(3))
+print(f"{'字体查找':<24} {'耗时(ms)':>10}")
+print(f"{'matplotlib（冷，重建字体缓存）':<18} {cold * 1000:>10.1f}")
+print(f"{'matplotlib（已有字体缓存）':<20} {warm * 1000:>10.1f}")
+print(f"{'读取 cache/font.json':<22} {cached * 1000:>10.1f}")
+
+# ========================= 2. 词云渲染 =========================
+df, article_bodies = load_corpus('classified_news_data_v2.json')
+df['topic_name'] = df['topic_id'].map(TOPIC_MAP)
+corpus = tokenize_corpus(article_bodies, hashes=getattr(article_bodies, 'hashes', None))
+store = NewsStore(df, TOPIC_MAP.values(), corpus)
+font_path = path
+
+months = pd.date_range(store.first_day, store.last_day, freq='MS')
+windows = [(store.first_day, store.last_day)] + [(m, m + pd.offsets.MonthEnd(0)) for m in months[::3]]
+word_sets = [f for start, end in windows for topic in [None] + store.topics
+             if (f := store.top_terms(start, end, topic, k=100))]
+
+truetype_calls = 0
+original_truetype = ImageFont.truetype
+
+
+def counting_truetype(*args, **kwargs):
+    global truetype_calls
+    truetype_calls += 1
+    return original_truetype(*args, **kwargs)
+
+
+ImageFont.truetype = counting_truetype
+
+
+def time_renders(get_font):
+    global truetype_calls
+    wordcloud_render.get_font = get_font
+    truetype_calls = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frequencies in word_sets:
+            wordcloud_render.render_wordcloud(frequencies, font_path)
+    renders = rounds * len(word_sets)
+    return (time.perf_counter() - start) / renders, truetype_calls / renders
+
+
+fonts.get_font.cache_clear()
+before, before_loads = time_renders(lambda path, size: ImageFont.truetype(path, size))
+after, after_loads = time_renders(fonts.get_font)
+print(f"--- {len(word_sets)} 组词频，每种方式渲染 {rounds} 轮，字体对象缓存 {fonts.get_font.cache_info().currsize} 个字号 ---")
+print(f"{'词云渲染':<24} {'每张耗时(ms)':>12} {'每张打开字体次数':>16}")
+print(f"{'每次重新打开字体':<20} {before * 1000:>12.1f} {before_loads:>16.1f}")
+print(f"{'复用字体对象':<22} {after * 1000:>12.1f} {after_loads:>16.1f}")
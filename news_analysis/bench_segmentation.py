@@ -0,0 +1,32 @@
+# bench_segmentation.py - 多进程分词吞吐量基准测试
+# 用法: python bench_segmentation.py [最大进程数] [重复倍数]
+
+import sys
+import json
+import time
+import os
+
+from preprocess import segment_texts
+
+max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+with open('classified_news_data_v2.json', 'r', encoding='utf-8') as f:
+    texts = [item['content'] for item in json.load(f)] * repeat
+
+print(f"--- 语料: {len(texts)} 篇文章, CPU 核心数: {os.cpu_count()} ---")
+baseline = None
+results = []
+for workers in range(1, max_workers + 1):
+    start = time.perf_counter()
+    keywords, _ = segment_texts(texts, workers=workers)
+    elapsed = time.perf_counter() - start
+    if baseline is None:
+        baseline = keywords
+    elif keywords != baseline:
+        sys.exit(f"错误：{workers} 个进程的分词结果与单进程不一致！")
+    results.append((workers, elapsed, len(texts) / elapsed))
+
+print(f"{'进程数':>6} {'耗时(s)':>10} {'篇/秒':>10} {'加速比':>8}")
+for workers, elapsed, rate in results:
+    print(f"{workers:>8} {elapsed:>12.2f} {rate:>12.1f} {rate / results[0][2]:>10.2f}x")
@@ -0,0 +1,140 @@
+# bench_server.py - 多进程服务的压测：不同工作进程数下的每秒请求数、延迟与内存占用
+# 用法: python bench_server.py [最大工作进程数] [每轮秒数] [并发客户端数]
+#
+# 每轮以 serve.py 启动服务，多个客户端进程并发发送 Dash 回调（各主题 TF-IDF 排行与表格首页、情感趋势）与 /cooccurrence.json 请求，
+# 日期窗口与主题随机选取。内存取自 /proc/<pid>/smaps_rollup（仅 Linux）：RSS 按进程重复计算共享页，
+# PSS 把共享页按进程数分摊，两者之差即 fork 后共享的部分。
+
+import os
+import sys
+import json
+import time
+import random
+import subprocess
+import urllib.request
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+PORT = 8097
+BASE_URL = f"http://127.0.0.1:{PORT}"
+FIRST_DAY, LAST_DAY = date(2024, 5, 24), date(2025, 7, 9)
+TOPICS = [None, '人才培养', '基础科研', '技术创新']
+STARTUP_TIMEOUT = 180
+
+max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+clients = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+
+def dash_request(outputs, inputs, state=()):
+    """构造 /_dash-update-component 的请求体，outputs、inputs 与 state 为 (组件 id, 属性[, 值]) 列表。"""
+    specs = [{'id': cid, 'property': prop} for cid, prop in outputs]
+    # 单输出回调的 output 与 outputs 不带列表包装，与浏览器端发送的格式一致
+    multi = len(outputs) > 1
+    body = {
+        'output': '..' + '...'.join(f"{cid}.{prop}" for cid, prop in outputs) + '..' if multi else
+                  f"{outputs[0][0]}.{outputs[0][1]}",
+        'outputs': specs if multi else specs[0],
+        'inputs': [{'id': cid, 'property': prop, 'value': value} for cid, prop, value in inputs],
+        'changedPropIds': [f"{inputs[0][0]}.{inputs[0][1]}"],
+        'state': [{'id': cid, 'property': prop, 'value': value} for cid, prop, value in state],
+    }
+    return urllib.request.Request(f"{BASE_URL}/_dash-update-component", data=json.dumps(body).encode('utf-8'),
+                                  headers={'Content-Type': 'application/json'})
+
+
+def random_request(rng):
+    start = FIRST_DAY + timedelta(days=rng.randrange((LAST_DAY - FIRST_DAY).days - 7))
+    end = min(start + timedelta(days=rng.choice([7, 30, 90, 365])), LAST_DAY)
+    start, end, topic = start.isoformat(), end.isoformat(), rng.choice(TOPICS)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return dash_request([('topic-bundle-store', 'data')],
+                            [('date-picker-range', 'start_date', start), ('date-picker-range', 'end_date', end)],
+                            [('news-table', 'page_size', 10)])
+    if kind == 1:
+        return dash_request([('sentiment-line-chart', 'figure')],
+                            [('date-picker-range', 'start_date', start), ('date-picker-range', 'end_date', end)])
+    query = f"start={start}&end={end}" + (f"&topic={urllib.request.quote(topic)}" if topic else '')
+    return urllib.request.Request(f"{BASE_URL}/cooccurrence.json?{query}")
+
+
+def client(seed, duration):
+    """在 duration 秒内串行发送请求，返回 (各请求延迟列表, 失败次数)。"""
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        request = random_request(rng)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+            latencies.append(time.perf_counter() - start)
+        except OSError:
+            errors += 1
+    return latencies, errors
+
+
+def memory_kb(pid):
+    """返回进程的 (RSS, PSS)，单位 KB。"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                values[key] = int(rest.split()[0])
+    return values['Rss'], values['Pss']
+
+
+def server_processes(master_pid):
+    with open(f"/proc/{master_pid}/task/{master_pid}/children", 'r') as f:
+        return [master_pid] + [int(pid) for pid in f.read().split()]
+
+
+def wait_until_ready(process):
+    try:
+        urllib.request.urlopen(f"{BASE_URL}/", timeout=5).close()
+        process.terminate()
+        sys.exit(f"错误：端口 {PORT} 已被其他服务占用！")
+    except OSError:
+        pass
+    deadline = time.perf_counter() + STARTUP_TIMEOUT
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            sys.exit("错误：服务启动失败！")
+        try:
+            with urllib.request.urlopen(f"{BASE_URL}/", timeout=5) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.5)
+    sys.exit("错误：等待服务启动超时！")
+
+
+print(f"--- CPU 核心数: {os.cpu_count()}，每轮 {seconds:g}s，{clients} 个并发客户端 ---")
+results = []
+for workers in range(1, max_workers + 1):
+    process = subprocess.Popen([sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(PORT),
+                                '--workers', str(workers)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(process)
+        client(0, 1.0)  # 预热：每个工作进程的首个请求有额外开销
+        with ProcessPoolExecutor(max_workers=clients) as executor:
+            runs = list(executor.map(client, range(1, clients + 1), [seconds] * clients))
+        memory = [memory_kb(pid) for pid in server_processes(process.pid)]
+    finally:
+        process.terminate()
+        process.wait()
+    latencies = np.array([t for run, _ in runs for t in run])
+    errors = sum(e for _, e in runs)
+    rss, pss = (sum(m[i] for m in memory) / 1024 for i in (0, 1))
+    results.append((workers, len(latencies) / seconds, np.percentile(latencies, 50) * 1000,
+                    np.percentile(latencies, 95) * 1000, errors, rss, pss))
+    print(f"--- {workers} 个工作进程: 完成 {len(latencies)} 个请求，失败 {errors} 个 ---")
+
+print(f"{'进程数':>6} {'请求/秒':>10} {'P50(ms)':>10} {'P95(ms)':>10} {'失败':>6} {'RSS合计(MB)':>12} {'PSS合计(MB)':>12}")
+for workers, rps, p50, p95, errors, rss, pss in results:
+    print(f"{workers:>8} {rps:>12.1f} {p50:>10.1f} {p95:>10.1f} {errors:>8} {rss:>14.1f} {pss:>14.1f}")
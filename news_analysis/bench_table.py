@@ -0,0 +1,60 @@
+# bench_table.py - 新闻表格构建基准测试：逐行 apply vs 加载时预生成的展示列
+# 用法: python bench_table.py [行数]
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from news_store import NewsStore, TABLE_COLUMNS
+from preprocess import TokenizedCorpus
+
+TOPICS = ["人才培养", "基础科研", "技术创新"]
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+rng = np.random.default_rng(0)
+start = pd.Timestamp('2024-05-24').value
+end = pd.Timestamp('2025-07-09').value
+df = pd.DataFrame({
+    'title': [f"新闻标题{i}" for i in range(n)],
+    'url': [f"http://www.ce.cn/xwzx/kj/t{i}.shtml" for i in range(n)],
+    'time': pd.to_datetime(rng.integers(start, end, n)),
+    'topic_name': rng.choice(TOPICS, n),
+    'probability': rng.random(n),
+})
+
+
+def build_table_before(rows):
+    """优化前回调中的做法：复制、格式化时间、逐行拼接 Markdown 链接。"""
+    dff_table = rows.copy().sort_values('time', ascending=False)
+    dff_table['time_str'] = dff_table['time'].dt.strftime('%Y-%m-%d %H:%M')
+    dff_table['title_link'] = dff_table.apply(lambda row: f"[{row['title']}]({row['url']})", axis=1)
+    return dff_table[TABLE_COLUMNS].to_dict('records')
+
+
+def build_table_after(rows):
+    """优化后：只选取预生成的列。"""
+    return rows.iloc[::-1][TABLE_COLUMNS].to_dict('records')
+
+
+def timed(fn, *args):
+    begin = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - begin
+
+
+empty_corpus = TokenizedCorpus([], np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int32), None)
+begin = time.perf_counter()
+store = NewsStore(df, TOPICS, empty_corpus)
+load_cost = time.perf_counter() - begin
+rows = store.select(store.first_day, store.last_day)
+
+before = timed(build_table_before, df)
+after = timed(build_table_after, rows)
+page = timed(lambda: store.query_table(store.first_day, store.last_day)[0][TABLE_COLUMNS].to_dict('records'))
+
+print(f"--- {n} 行新闻 (NewsStore 加载耗时 {load_cost:.2f}s，含一次性生成展示列) ---")
+print(f"优化前 全部行构建表格: {before * 1000:10.1f} ms")
+print(f"优化后 全部行构建表格: {after * 1000:10.1f} ms  ({before / after:.1f}x)")
+print(f"优化后 服务端分页单页: {page * 1000:10.1f} ms  ({before / page:.1f}x)")
@@ -0,0 +1,46 @@
+# bench_topic_inference.py - 批量主题推断的吞吐量与准确性测试
+# 用法: python bench_topic_inference.py [语料复制倍数]
+# 与 classified_news_data_v2.json 中已有的 predicted_topic 对比，并与 gensim 逐篇推断比较速度
+
+import sys
+import json
+import time
+
+import numpy as np
+
+from preprocess import tokenize_corpus
+from topic_inference import TopicInferencer
+
+repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+
+with open('classified_news_data_v2.json', 'r', encoding='utf-8') as f:
+    data = json.load(f)
+docs = tokenize_corpus([item['content'] for item in data]).keywords()
+labels = np.array([item['predicted_topic']['id'] for item in data])
+label_probs = np.array([item['predicted_topic']['probability'] for item in data])
+
+start = time.perf_counter()
+inferencer = TopicInferencer()
+print(f"--- 模型加载耗时 {time.perf_counter() - start:.2f}s ---")
+
+results = inferencer.classify(docs)
+topic_ids = np.array([t for t, _ in results])
+probs = np.array([p for _, p in results])
+print(f"主题一致: {(topic_ids == labels).sum()}/{len(labels)}")
+print(f"概率误差: 平均 {np.abs(probs - label_probs).mean():.5f}, 最大 {np.abs(probs - label_probs).max():.5f}")
+
+batch = docs * repeat
+start = time.perf_counter()
+inferencer.infer(batch)
+elapsed = time.perf_counter() - start
+print(f"批量向量化推断: {len(batch)} 篇, {elapsed:.3f}s, {len(batch) / elapsed:.0f} 篇/秒")
+
+from gensim.corpora import Dictionary
+from gensim.models import LdaModel
+model = LdaModel.load('lda_k3.model', mmap='r')
+dictionary = Dictionary.load('lda_k3.dict')
+start = time.perf_counter()
+for words in docs:
+    model.get_document_topics(dictionary.doc2bow(words), minimum_probability=0)
+elapsed = time.perf_counter() - start
+print(f"gensim 逐篇推断:   {len(docs)} 篇, {elapsed:.3f}s, {len(docs) / elapsed:.0f} 篇/秒")
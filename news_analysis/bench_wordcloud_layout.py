@@ -0,0 +1,63 @@
+# bench_wordcloud_layout.py - 词云渲染基准测试：逐个滑动一周的日期窗口，对比原版 WordCloud、二分查找字号、二分查找并沿用锚点起始字号
+# 用法: python bench_wordcloud_layout.py [滑动步长(天)] [窗口天数] [主题，默认全部主题]
+#
+# 渲染耗时包含布局与 PNG 编码。锚点与 WordCloudCache 一致，为该主题整个日期范围的词云。
+
+import io
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import fonts
+from corpus_store import load_corpus
+from preprocess import tokenize_corpus
+from news_store import NewsStore
+from wordcloud import WordCloud
+from wordcloud_render import WORDCLOUD_RANDOM_STATE, render_wordcloud_sized
+
+TOPIC_MAP = {1: "人才培养", 2: "基础科研", 3: "技术创新"}
+step = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+window = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+topic = sys.argv[3] if len(sys.argv) > 3 else None
+
+df, article_bodies = load_corpus('classified_news_data_v2.json')
+df['topic_name'] = df['topic_id'].map(TOPIC_MAP)
+corpus = tokenize_corpus(article_bodies, hashes=getattr(article_bodies, 'hashes', None))
+store = NewsStore(df, TOPIC_MAP.values(), corpus)
+font_path = fonts.find_font()[1]
+
+starts = pd.date_range(store.first_day, store.last_day - pd.Timedelta(days=window - 1), freq=f"{step}D")
+word_sets = [f for start in starts if (f := store.top_terms(start, start + pd.Timedelta(days=window - 1), topic))]
+print(f"--- 「{topic or '全部主题'}」{len(word_sets)} 个 {window} 天窗口，步长 {step} 天 ---")
+
+
+def render_stock(frequencies):
+    wc = WordCloud(font_path=font_path, width=800, height=500, background_color=None, mode="RGBA", max_words=100,
+                   collocations=False, colormap='viridis', prefer_horizontal=0.9, relative_scaling=0.5,
+                   random_state=WORDCLOUD_RANDOM_STATE)
+    wc.generate_from_frequencies(frequencies)
+    wc.to_image().save(io.BytesIO(), format='PNG')
+
+
+anchor_size = render_wordcloud_sized(store.top_terms(store.first_day, store.last_day, topic), font_path)[1]
+variants = (
+    ('原版 WordCloud', render_stock),
+    ('二分查找', lambda frequencies: render_wordcloud_sized(frequencies, font_path)),
+    ('二分查找+锚点字号', lambda frequencies: render_wordcloud_sized(frequencies, font_path, font_size=anchor_size)),
+)
+times = {name: [] for name, _ in variants}
+for frequencies in word_sets:
+    for name, render in variants:
+        start = time.perf_counter()
+        render(frequencies)
+        times[name].append(time.perf_counter() - start)
+
+print(f"{'方式':<16} {'平均(ms)':>10} {'P50(ms)':>10} {'P95(ms)':>10}")
+for name, _ in variants:
+    values = np.array(times[name]) * 1000
+    print(f"{name:<16} {values.mean():>10.1f} {np.percentile(values, 50):>10.1f} {np.percentile(values, 95):>10.1f}")
+baseline = np.mean(times[variants[0][0]])
+print(f"--- 锚点起始字号 {anchor_size}，相对原版加速比："
+      + "，".join(f"{name} {baseline / np.mean(times[name]):.2f}x" for name, _ in variants[1:]) + " ---")
@@ -0,0 +1,383 @@
+# build_artifacts.py - 无界面批量构建：从语料重新生成仪表盘链接的全部静态报告
+# 用法: python build_artifacts.py [--force] [--workers N] [阶段名 ...]
+#
+# 各构建阶段组成依赖图，互不依赖的阶段在进程池中并行执行：
+#   word_stats    processed_text.txt                    -> cache/build/word_stats.json   (词频、TF-IDF、共现热力图)
+#   pos_stats     processed_text.txt                    -> cache/build/pos_stats.json    (词性统计)
+#   plot_data     word_stats, pos_stats                 -> assets/plot_data.json
+#   dashboard     plot_data                             -> assets/data_visualization_dashboard.html
+#   cooccurrence  processed_text.txt                    -> assets/word_co-occurrence_network_warm_theme.html
+#   lda_vis       classified_news_data_v2.json, lda_k3  -> assets/lda_visualization_final_k3.html
+# 每个阶段按输入文件内容、参数与阶段代码计算摘要，与 cache/build/manifest.json 中的记录一致且输出未被改动时跳过。
+# 输出先写临时文件再原子替换，构建中断不会在 assets/ 中留下写了一半的页面。
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import inspect
+import argparse
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from fileio import file_digest, read_json, write_json_atomic, write_text_atomic
+from preprocess import cache_signature
+from cooccurrence import (COOCCURRENCE_WINDOW, MIN_FREQUENCY, TOP_N, encode_pairs, pair_counts,
+                          strongest_pairs)
+
+ASSETS_DIR = 'assets'
+BUILD_CACHE_DIR = os.path.join('cache', 'build')
+MANIFEST_PATH = os.path.join(BUILD_CACHE_DIR, 'manifest.json')
+# 阶段共用的辅助函数有改动时递增此版本号，使所有阶段重新构建
+BUILD_VERSION = 2
+
+TOKEN_TEXT = 'processed_text.txt'
+CORPUS_JSON = 'classified_news_data_v2.json'
+LDA_FILES = ['lda_k3.model', 'lda_k3.model.expElogbeta.npy', 'lda_k3.model.state', 'lda_k3.model.id2word',
+             'lda_k3.dict']
+
+
+# ========================= 0. 通用工具 =========================
+def read_token_stream(path=TOKEN_TEXT):
+    """读取以空格分词、按段落分行的文本，返回 (词表, 整数编码的词序列)。"""
+    with open(path, 'r', encoding='utf-8') as f:
+        tokens = f.read().split()
+    vocab, ids = np.unique(np.array(tokens, dtype=object), return_inverse=True)
+    return vocab.tolist(), ids.astype(np.int32)
+
+
+# ========================= 1. 构建阶段 =========================
+def build_word_stats(inputs, outputs, window, cloud_words, tfidf_words, heatmap_pairs):
+    vocab, ids = read_token_stream(inputs[0])
+    freq = np.bincount(ids, minlength=len(vocab))
+    order = np.argsort(-freq, kind='stable')
+
+    # 整个语料视为一篇文档时的 TF-IDF（L2 归一化）
+    tfidf = freq / np.sqrt((freq.astype(np.float64) ** 2).sum())
+    # 整段文本视为一个序列统计共现（窗口跨越段落）
+    codes, counts = pair_counts(ids, window=window)
+    heatmap_ids = np.array(sorted({i for a, b, _, _ in strongest_pairs(codes, counts, freq, 1, heatmap_pairs)
+                                   for i in (a, b)}, key=lambda i: vocab[i]), dtype=np.int64)
+    cells = encode_pairs(heatmap_ids[:, None], heatmap_ids[None, :])
+    pos = np.minimum(np.searchsorted(codes, cells), len(codes) - 1)
+    heatmap = np.where((codes[pos] == cells) & (heatmap_ids[:, None] != heatmap_ids[None, :]), counts[pos], 0)
+
+    write_json_atomic(outputs[0], {
+        'word_cloud_data': [[vocab[i], int(freq[i])] for i in order[:cloud_words]],
+        'tfidf_bar_data': [{'word': vocab[i], 'freq': int(freq[i]), 'tfidf': float(tfidf[i])}
+                           for i in order[:tfidf_words]],
+        'heatmap_words': [vocab[i] for i in heatmap_ids],
+        'heatmap_data': [[i, j, int(heatmap[i, j])] for i in range(len(heatmap_ids))
+                         for j in range(len(heatmap_ids))],
+    })
+
+
+POS_NAMES = {'n': '名词', 'v': '动词', 'ns': '地名', 'a': '形容词', 'd': '副词'}
+
+
+def build_pos_stats(inputs, outputs, top_words, pie_slices):
+    import jieba
+    import jieba.posseg as pseg
+    jieba.setLogLevel('WARN')
+
+    flags, nouns, verbs = Counter(), Counter(), Counter()
+    with open(inputs[0], 'r', encoding='utf-8') as f:
+        for line in f:
+            for word, flag in pseg.cut(line.strip()):
+                # 分词文本中的空格会被标为 x，不计入统计
+                if not word.strip():
+                    continue
+                flags[flag] += 1
+                if flag == 'n':
+                    nouns[word] += 1
+                elif flag == 'v':
+                    verbs[word] += 1
+
+    main_flags = flags.most_common(pie_slices)
+    others = sum(flags.values()) - sum(n for _, n in main_flags)
+    write_json_atomic(outputs[0], {
+        'top_12_nouns': [[w, n] for w, n in nouns.most_common(top_words)],
+        'top_12_verbs': [[w, n] for w, n in verbs.most_common(top_words)],
+        'pos_pie_data': [[POS_NAMES.get(flag, flag), n] for flag, n in main_flags] + [['其他', others]],
+    })
+
+
+def build_plot_data(inputs, outputs):
+    word_stats, pos_stats = read_json(inputs[0]), read_json(inputs[1])
+    keys = ['word_cloud_data', 'top_12_nouns', 'top_12_verbs', 'pos_pie_data', 'tfidf_bar_data',
+            'heatmap_words', 'heatmap_data']
+    merged = dict(word_stats, **pos_stats)
+    write_json_atomic(outputs[0], {key: merged[key] for key in keys})
+
+
+def build_dashboard(inputs, outputs, seed):
+    from pyecharts import options as opts
+    from pyecharts.charts import Bar, HeatMap, Page, Pie, WordCloud
+
+    data = read_json(inputs[0])
+    # 词云颜色由 pyecharts 随机生成，固定种子使相同输入得到相同页面
+    random.seed(seed)
+    init = lambda name: opts.InitOpts(chart_id=name)
+
+    word_cloud = (
+        WordCloud(init_opts=init('word_cloud'))
+        .add('热点词汇', [tuple(item) for item in data['word_cloud_data']], word_size_range=[15, 100], shape='diamond')
+        .set_global_opts(title_opts=opts.TitleOpts(title='新闻热点词云图'))
+    )
+    tfidf = data['tfidf_bar_data']
+    tfidf_bar = (
+        Bar(init_opts=init('tfidf_bar'))
+        .add_xaxis([item['word'] for item in tfidf])
+        .add_yaxis('词频 (Freq)', [item['freq'] for item in tfidf])
+        .add_yaxis('TF-IDF', [round(item['tfidf'], 4) for item in tfidf])
+        .set_global_opts(title_opts=opts.TitleOpts(title='高频词的词频与TF-IDF对比'),
+                         xaxis_opts=opts.AxisOpts(axislabel_opts=opts.LabelOpts(rotate=30)))
+    )
+
+    def top_words_bar(name, key, series, title):
+        items = data[key][::-1]
+        return (
+            Bar(init_opts=init(name))
+            .add_xaxis([w for w, _ in items])
+            .add_yaxis(series, [n for _, n in items])
+            .reversal_axis()
+            .set_series_opts(label_opts=opts.LabelOpts(position='right'))
+            .set_global_opts(title_opts=opts.TitleOpts(title=title))
+        )
+
+    pos_pie = (
+        Pie(init_opts=init('pos_pie'))
+        .add('', [tuple(item) for item in data['pos_pie_data']], radius=['40%', '75%'])
+        .set_global_opts(title_opts=opts.TitleOpts(title='文本主要词性分布'),
+                         legend_opts=opts.LegendOpts(orient='vertical', pos_top='15%', pos_left='2%'))
+        .set_series_opts(label_opts=opts.LabelOpts(formatter='{b}: {c} ({d}%)'))
+    )
+    words = data['heatmap_words']
+    heatmap = (
+        HeatMap(init_opts=init('cooccurrence_heatmap'))
+        .add_xaxis(words)
+        .add_yaxis('共现次数', words, data['heatmap_data'], label_opts=opts.LabelOpts(is_show=True, position='inside'))
+        .set_global_opts(title_opts=opts.TitleOpts(title='核心词共现热力图'),
+                         xaxis_opts=opts.AxisOpts(axislabel_opts=opts.LabelOpts(rotate=45)),
+                         visualmap_opts=opts.VisualMapOpts(min_=0, max_=max(v for _, _, v in data['heatmap_data']),
+                                                           orient='horizontal', pos_left='center'))
+    )
+
+    page = Page(layout=Page.SimplePageLayout)
+    page.add(word_cloud, tfidf_bar,
+             top_words_bar('top_nouns_bar', 'top_12_nouns', '名词', '高频名词 Top 12'),
+             top_words_bar('top_verbs_bar', 'top_12_verbs', '动词', '高频动词 Top 12'),
+             pos_pie, heatmap)
+    write_text_atomic(outputs[0], page.render_embed())
+
+
+NETWORK_NODE_STYLE = {
+    'color': {'background': '#FF8C69', 'border': '#8B4513',
+              'highlight': {'background': '#FFA07A', 'border': '#A0522D'},
+              'hover': {'background': '#FFA07A', 'border': '#A0522D'}},
+    'font': {'color': '#6B4423'}, 'shape': 'dot', 'shadow': True, 'borderWidth': 1.5,
+}
+NETWORK_EDGE_STYLE = {
+    'color': {'color': '#D2B48C', 'highlight': '#CD853F', 'hover': '#CD853F'},
+    'smooth': {'type': 'continuous'},
+}
+NETWORK_OPTIONS = {
+    'nodes': {'font': {'size': 12, 'face': 'MicrosoftYaHei', 'strokeWidth': 2, 'strokeColor': '#ffffff'},
+              'scaling': {'min': 8, 'max': 25, 'label': {'enabled': True, 'min': 8, 'max': 20}}},
+    'edges': {'smooth': {'type': 'continuous', 'roundness': 0.5}, 'scaling': {'min': 0.5, 'max': 3},
+              'hidden': False, 'hoverWidth': 0.5, 'selectionWidth': 0.5},
+    'physics': {'enabled': True,
+                'forceAtlas2Based': {'gravitationalConstant': -30, 'centralGravity': 0.01, 'springLength': 100,
+                                     'springConstant': 0.04, 'damping': 0.15, 'avoidOverlap': 0.5},
+                'minVelocity': 0.4, 'solver': 'forceAtlas2Based',
+                'stabilization': {'enabled': True, 'iterations': 500, 'updateInterval': 25}},
+    'interaction': {'hover': True, 'tooltipDelay': 200, 'hideEdgesOnDrag': False, 'hideNodesOnDrag': False,
+                    'multiselect': True, 'navigationButtons': True},
+}
+
+
+def build_cooccurrence_network(inputs, outputs, window, min_frequency, top_n):
+    from pyvis.network import Network
+
+    vocab, ids = read_token_stream(inputs[0])
+    freq = np.bincount(ids, minlength=len(vocab))
+    codes, counts = pair_counts(ids, window=window)
+    edges = strongest_pairs(codes, counts, freq, min_frequency, top_n)
+
+    net = Network(height='800px', width='100%', bgcolor='#FDF5E6', font_color='#6B4423', cdn_resources='remote')
+    for i in dict.fromkeys(i for a, b, _, _ in edges for i in (a, b)):
+        net.add_node(vocab[i], label=vocab[i], size=12 * np.log1p(freq[i]) + 6, title=f"词频: {freq[i]}",
+                     **NETWORK_NODE_STYLE)
+    for a, b, count, lift in edges:
+        width = 0.75 * np.log1p(count)
+        net.add_edge(vocab[a], vocab[b], value=width, width=width, title=f"共现: {count}\nLift: {lift:.2f}",
+                     **NETWORK_EDGE_STYLE)
+    net.set_options(json.dumps(NETWORK_OPTIONS))
+    write_text_atomic(outputs[0], net.generate_html())
+
+
+def build_lda_vis(inputs, outputs, token_signature):
+    import pyLDAvis
+    import pyLDAvis.gensim_models
+    from gensim.corpora import Dictionary
+    from gensim.models import LdaModel
+    from corpus_store import read_json_corpus
+    from preprocess import tokenize_corpus
+
+    df = read_json_corpus(inputs[0])
+    # 本阶段已在工作进程中运行，分词不再另开进程池
+    keywords = tokenize_corpus(df['content'], workers=1).keywords()
+    model = LdaModel.load(inputs[1])
+    dictionary = Dictionary.load(inputs[-1])
+    bow = [dictionary.doc2bow(words) for words in keywords]
+    vis = pyLDAvis.gensim_models.prepare(model, bow, dictionary, n_jobs=1)
+    write_text_atomic(outputs[0], pyLDAvis.prepared_data_to_html(vis, visid='ldavis_lda_k3'))
+
+
+Stage = namedtuple('Stage', ['name', 'func', 'inputs', 'outputs', 'params'])
+
+
+def build_stages():
+    word_stats = os.path.join(BUILD_CACHE_DIR, 'word_stats.json')
+    pos_stats = os.path.join(BUILD_CACHE_DIR, 'pos_stats.json')
+    plot_data = os.path.join(ASSETS_DIR, 'plot_data.json')
+    return [
+        Stage('word_stats', build_word_stats, [TOKEN_TEXT], [word_stats],
+              {'window': COOCCURRENCE_WINDOW, 'cloud_words': 200, 'tfidf_words': 20, 'heatmap_pairs': 20}),
+        Stage('pos_stats', build_pos_stats, [TOKEN_TEXT], [pos_stats],
+              {'top_words': 12, 'pie_slices': 10}),
+        Stage('plot_data', build_plot_data, [word_stats, pos_stats], [plot_data], {}),
+        Stage('dashboard', build_dashboard, [plot_data],
+              [os.path.join(ASSETS_DIR, 'data_visualization_dashboard.html')], {'seed': 42}),
+        Stage('cooccurrence', build_cooccurrence_network, [TOKEN_TEXT],
+              [os.path.join(ASSETS_DIR, 'word_co-occurrence_network_warm_theme.html')],
+              {'window': COOCCURRENCE_WINDOW, 'min_frequency': MIN_FREQUENCY, 'top_n': TOP_N}),
+        Stage('lda_vis', build_lda_vis, [CORPUS_JSON] + LDA_FILES,
+              [os.path.join(ASSETS_DIR, 'lda_visualization_final_k3.html')], {'token_signature': cache_signature()}),
+    ]
+
+
+STAGES = {stage.name: stage for stage in build_stages()}
+
+
+# ========================= 2. 依赖调度与增量构建 =========================
+def stage_key(stage):
+    """由阶段代码、参数和各输入文件的内容摘要得到的构建键。"""
+    h = hashlib.sha1()
+    h.update(f"build={BUILD_VERSION};stage={stage.name}".encode('utf-8'))
+    h.update(inspect.getsource(stage.func).encode('utf-8'))
+    h.update(json.dumps(stage.params, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    for path in stage.inputs:
+        h.update(f"{path}={file_digest(path)}".encode('utf-8'))
+    return h.hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        return read_json(path)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_up_to_date(stage, key, manifest):
+    record = manifest.get(stage.name)
+    if not record or record.get('key') != key:
+        return False
+    # 输出被删除或手动改动过时同样重新构建
+    return all(os.path.exists(path) and file_digest(path) == record['outputs'].get(path)
+               for path in stage.outputs)
+
+
+def run_stage(name):
+    stage = STAGES[name]
+    start = time.perf_counter()
+    stage.func(stage.inputs, stage.outputs, **stage.params)
+    return time.perf_counter() - start
+
+
+def stage_dependencies(names):
+    """返回 {阶段名: 依赖的阶段名集合}，依赖由输入文件是否为其他阶段的输出决定。"""
+    producers = {path: stage.name for stage in STAGES.values() for path in stage.outputs}
+    return {name: {producers[path] for path in STAGES[name].inputs if path in producers} for name in names}
+
+
+def with_upstream(names):
+    selected, pending = set(), list(names)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(stage_dependencies([name])[name])
+    return [name for name in STAGES if name in selected]
+
+
+def build(names=None, workers=None, force=False):
+    """按依赖顺序构建所选阶段（连同其上游），返回 {阶段名: 'built'/'skipped'/'failed'}。"""
+    names = with_upstream(names or list(STAGES))
+    deps = stage_dependencies(names)
+    manifest = load_manifest()
+    status, running, submitted = {}, {}, set()
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            # 提交所有依赖已完成的阶段；跳过的阶段立即完成，可能使更多阶段就绪，因此循环到没有新阶段为止
+            progressed = True
+            while progressed:
+                progressed = False
+                for name in names:
+                    if name in status or name in submitted or not deps[name] <= set(status):
+                        continue
+                    progressed = True
+                    if any(status[dep] == 'failed' for dep in deps[name]):
+                        print(f"!!! 阶段 {name} 的上游构建失败，已跳过 !!!")
+                        status[name] = 'failed'
+                        continue
+                    stage = STAGES[name]
+                    key = stage_key(stage)
+                    if not force and is_up_to_date(stage, key, manifest):
+                        print(f"--- {name}: 输入未变化，跳过 ---")
+                        status[name] = 'skipped'
+                        continue
+                    running[executor.submit(run_stage, name)] = (name, key)
+                    submitted.add(name)
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key = running.pop(future)
+                try:
+                    elapsed = future.result()
+                except Exception as e:
+                    print(f"!!! 阶段 {name} 构建失败: {e} !!!")
+                    status[name] = 'failed'
+                    continue
+                manifest[name] = {'key': key,
+                                  'outputs': {path: file_digest(path) for path in STAGES[name].outputs}}
+                write_json_atomic(MANIFEST_PATH, manifest)
+                print(f"--- {name}: 构建完成，耗时 {elapsed:.2f}s ---")
+                status[name] = 'built'
+    return status
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='重新生成 assets/ 下的静态报告')
+    parser.add_argument('stages', nargs='*', help=f"只构建指定阶段（连同其上游），可选: {', '.join(STAGES)}")
+    parser.add_argument('--force', action='store_true', help='忽略构建记录，重新构建所有所选阶段')
+    parser.add_argument('--workers', type=int, default=None, help='并行进程数，默认使用全部 CPU 核心')
+    args = parser.parse_args()
+    unknown = [name for name in args.stages if name not in STAGES]
+    if unknown:
+        parser.error(f"未知的阶段: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    status = build(args.stages, args.workers, args.force)
+    counts = Counter(status.values())
+    print(f"--- 构建结束: 完成 {counts['built']} 个，跳过 {counts['skipped']} 个，失败 {counts['failed']} 个，"
+          f"总耗时 {time.perf_counter() - start:.2f}s ---")
+    sys.exit(1 if counts['failed'] else 0)
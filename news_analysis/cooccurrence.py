@@ -0,0 +1,79 @@
+# cooccurrence.py - 词语共现统计：在整数编码的词序列上按滑动窗口向量化计数
+#
+# 距离小于 COOCCURRENCE_WINDOW 的两个不同词记一次共现。无序词对 (a, b)（a < b）编码为
+# 一个 int64：(a << 32) | b，编码只依赖词 ID，词表追加新词后旧编码保持不变。
+
+import numpy as np
+
+# 与 README 中共现网络的超参数一致
+COOCCURRENCE_WINDOW = 10
+MIN_FREQUENCY = 5
+TOP_N = 50
+PAIR_SHIFT = 32
+
+
+def encode_pairs(a, b):
+    lo, hi = np.minimum(a, b).astype(np.int64), np.maximum(a, b).astype(np.int64)
+    return (lo << PAIR_SHIFT) | hi
+
+
+def decode_pairs(codes):
+    codes = np.asarray(codes, dtype=np.int64)
+    return codes >> PAIR_SHIFT, codes & ((1 << PAIR_SHIFT) - 1)
+
+
+def window_pairs(ids, offsets=None, window=COOCCURRENCE_WINDOW, keep=None):
+    """返回序列中所有距离小于 window 的词对 (所在文档下标, 词对编码)，同一个词与自身不计。
+
+    offsets 给出各文档在 ids 中的起止位置时窗口不跨越文档边界；为 None 时把 ids 视为一整篇。
+    keep 为与 ids 等长的布尔数组时，只统计两端都为 True 的词对（被排除的词仍占据位置，不改变距离）。
+    每种距离只做一次整体的数组切片比较，没有逐词的 Python 循环。
+    """
+    ids = np.asarray(ids)
+    if offsets is None:
+        offsets = np.array([0, len(ids)])
+    doc_of = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    docs, codes = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+    for d in range(1, min(window, len(ids))):
+        left, right = ids[:len(ids) - d], ids[d:]
+        valid = (doc_of[:len(ids) - d] == doc_of[d:]) & (left != right)
+        if keep is not None:
+            valid &= keep[:len(ids) - d] & keep[d:]
+        docs.append(doc_of[:len(ids) - d][valid])
+        codes.append(encode_pairs(left[valid], right[valid]))
+    return np.concatenate(docs), np.concatenate(codes)
+
+
+def pair_counts(ids, offsets=None, window=COOCCURRENCE_WINDOW, keep=None):
+    """整段语料的共现计数，返回 (升序的词对编码, 对应次数)。"""
+    _, codes = window_pairs(ids, offsets, window, keep)
+    return np.unique(codes, return_counts=True)
+
+
+def strongest_pairs(codes, counts, freq, min_frequency=MIN_FREQUENCY, top_n=TOP_N):
+    """共现次数最多的 top_n 个词对 [(a, b, 次数, 提升度)]，两端词频都不低于 min_frequency。
+
+    提升度 = 共现次数 × 总词数 / (词频a × 词频b)，大于 1 表示两词比随机分布更常一起出现。
+    """
+    nonzero = np.flatnonzero(counts)
+    codes, counts = np.asarray(codes)[nonzero], np.asarray(counts)[nonzero]
+    a, b = decode_pairs(codes)
+    keep = (freq[a] >= min_frequency) & (freq[b] >= min_frequency)
+    a, b, counts = a[keep], b[keep], counts[keep]
+    top_n = min(top_n, len(counts))
+    if top_n == 0:
+        return []
+    top = np.argpartition(-counts, top_n - 1)[:top_n]
+    top = top[np.lexsort((b[top], a[top], -counts[top]))]
+    total = float(freq.sum())
+    return [(int(a[k]), int(b[k]), int(counts[k]), counts[k] * total / (freq[a[k]] * freq[b[k]])) for k in top]
+
+
+def network_data(edges, vocab, freq):
+    """把 strongest_pairs 的结果整理为可直接序列化为 JSON 的节点与边列表。"""
+    nodes = list(dict.fromkeys(i for a, b, _, _ in edges for i in (a, b)))
+    return {
+        'nodes': [{'id': vocab[i], 'freq': int(freq[i])} for i in nodes],
+        'edges': [{'from': vocab[a], 'to': vocab[b], 'count': count, 'lift': round(float(lift), 2)}
+                  for a, b, count, lift in edges],
+    }
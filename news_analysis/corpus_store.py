@@ -0,0 +1,177 @@
+# corpus_store.py - 新闻语料的列式二进制存储
+# 用法: python corpus_store.py [classified_news_data_v2.json] [输出目录]
+#
+# 把 JSON 语料转换为按列存放的类型化文件，仪表盘启动时直接内存映射读取：
+#   topic_id.npy      - int8
+#   probability.npy   - float32
+#   time.npy          - datetime64[ns]
+#   {url,title}_codes.npy + {url,title}_dict.bin - 字典编码的字符串列（字典为 \0 分隔的 UTF-8）
+#   content.bin + content_offsets.npy            - 正文按偏移量随机读取
+#   content_hashes.npy                           - 正文 SHA1 摘要，供分词缓存直接使用
+#   meta.json         - 源文件大小/修改时间与行数，最后写入
+
+import os
+import sys
+import json
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from preprocess import content_hash
+
+CORPUS_JSON = 'classified_news_data_v2.json'
+CORPUS_STORE_DIR = os.path.join('cache', 'corpus')
+STRING_SEPARATOR = '\0'
+ARTICLE_CACHE_SIZE = 256
+
+
+def read_json_corpus(json_path=CORPUS_JSON):
+    """按原始方式读取 JSON 语料并展开为 DataFrame。"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    df = pd.json_normalize(data)
+    df.rename(columns={'predicted_topic.id': 'topic_id', 'predicted_topic.probability': 'probability'}, inplace=True)
+    df['topic_id'] = df['topic_id'].astype(int)
+    df['time'] = pd.to_datetime(df['time'])
+    return df
+
+
+def _source_signature(json_path):
+    stat = os.stat(json_path)
+    return {'source': os.path.abspath(json_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _save(path, array):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        if isinstance(array, bytes):
+            f.write(array)
+        else:
+            np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _save_dictionary_column(store_dir, name, values):
+    categories, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    _save(os.path.join(store_dir, f'{name}_codes.npy'), codes.astype(np.int32))
+    _save(os.path.join(store_dir, f'{name}_dict.bin'), STRING_SEPARATOR.join(categories).encode('utf-8'))
+
+
+def write_corpus_store(df, json_path=CORPUS_JSON, store_dir=CORPUS_STORE_DIR):
+    """把已展开的语料写成列式存储。meta.json 最后写入，中途中断的存储不会被读取。"""
+    os.makedirs(store_dir, exist_ok=True)
+    meta_path = os.path.join(store_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    _save(os.path.join(store_dir, 'topic_id.npy'), df['topic_id'].to_numpy(dtype=np.int8))
+    _save(os.path.join(store_dir, 'probability.npy'), df['probability'].to_numpy(dtype=np.float32))
+    _save(os.path.join(store_dir, 'time.npy'), df['time'].to_numpy(dtype='datetime64[ns]'))
+    _save_dictionary_column(store_dir, 'url', df['url'])
+    _save_dictionary_column(store_dir, 'title', df['title'])
+
+    contents = [t if isinstance(t, str) else '' for t in df['content']]
+    encoded = [t.encode('utf-8') for t in contents]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    _save(os.path.join(store_dir, 'content.bin'), b''.join(encoded))
+    _save(os.path.join(store_dir, 'content_offsets.npy'), offsets)
+    hashes = np.frombuffer(b''.join(content_hash(t) for t in contents), dtype=np.uint8).reshape(-1, 20)
+    _save(os.path.join(store_dir, 'content_hashes.npy'), hashes)
+
+    meta = dict(_source_signature(json_path), n_docs=len(df))
+    meta_tmp = f"{meta_path}.tmp-{os.getpid()}"
+    with open(meta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(meta_tmp, meta_path)
+
+
+class ArticleBodies:
+    """按偏移量从 content.bin 中按需读取新闻正文，最近读取的正文保存在有界 LRU 缓存中。
+
+    支持 len() 与下标访问，可直接交给 tokenize_corpus；hashes 为各篇正文的 SHA1 摘要。
+    """
+
+    def __init__(self, blob_path, offsets, hashes, cache_size=ARTICLE_CACHE_SIZE):
+        self.offsets = offsets
+        self.hashes = hashes
+        self._blob = np.memmap(blob_path, dtype=np.uint8, mode='r') if offsets[-1] > 0 \
+            else np.zeros(0, dtype=np.uint8)
+        self._read = lru_cache(maxsize=cache_size)(self._read_uncached)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self._read(int(i))
+
+    def _read_uncached(self, i):
+        return self._blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+
+def _load_dictionary_column(store_dir, name):
+    codes = np.load(os.path.join(store_dir, f'{name}_codes.npy'), mmap_mode='r')
+    with open(os.path.join(store_dir, f'{name}_dict.bin'), 'rb') as f:
+        categories = f.read().decode('utf-8').split(STRING_SEPARATOR)
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def load_corpus_store(json_path=CORPUS_JSON, store_dir=CORPUS_STORE_DIR):
+    """内存映射读取列式存储，返回 (不含正文的 DataFrame, ArticleBodies)。
+
+    存储不存在或已落后于 JSON 源文件时返回 None。
+    """
+    try:
+        with open(os.path.join(store_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        signature = _source_signature(json_path)
+        if any(meta.get(key) != value for key, value in signature.items()):
+            return None
+        column = lambda name: np.load(os.path.join(store_dir, f'{name}.npy'), mmap_mode='r')
+        df = pd.DataFrame({
+            'title': _load_dictionary_column(store_dir, 'title'),
+            'url': _load_dictionary_column(store_dir, 'url'),
+            'time': column('time'),
+            'topic_id': column('topic_id'),
+            'probability': column('probability'),
+        })
+        bodies = ArticleBodies(os.path.join(store_dir, 'content.bin'), column('content_offsets'),
+                               column('content_hashes'))
+    except (OSError, ValueError, KeyError):
+        return None
+    if len(df) != meta['n_docs'] or len(bodies) != meta['n_docs']:
+        return None
+    return df, bodies
+
+
+def load_corpus(json_path=CORPUS_JSON, store_dir=CORPUS_STORE_DIR):
+    """返回 (不含正文的 DataFrame, 正文序列)。
+
+    优先读取列式存储；不可用时回退到 JSON 并写出列式存储，之后同样按需读取正文。
+    """
+    loaded = load_corpus_store(json_path, store_dir)
+    if loaded is not None:
+        print(f"--- 已从列式存储 {store_dir} 载入 {len(loaded[0])} 条新闻 ---")
+        return loaded
+    df = read_json_corpus(json_path)
+    try:
+        write_corpus_store(df, json_path, store_dir)
+        loaded = load_corpus_store(json_path, store_dir)
+    except OSError as e:
+        print(f"!!! 写入列式存储失败: {e} !!!")
+    if loaded is None:
+        # 无法写出列式存储时只能把正文留在内存中
+        return df.drop(columns='content'), df['content'].tolist()
+    print(f"--- 已生成列式存储 {store_dir}，下次启动将直接内存映射读取 ---")
+    return loaded
+
+
+if __name__ == '__main__':
+    json_path = sys.argv[1] if len(sys.argv) > 1 else CORPUS_JSON
+    store_dir = sys.argv[2] if len(sys.argv) > 2 else CORPUS_STORE_DIR
+    start = time.perf_counter()
+    df = read_json_corpus(json_path)
+    write_corpus_store(df, json_path, store_dir)
+    print(f"--- 已将 {len(df)} 条新闻转换为列式存储 {store_dir}，耗时 {time.perf_counter() - start:.2f}s ---")
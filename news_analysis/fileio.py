@@ -0,0 +1,33 @@
+# fileio.py - 构建与缓存脚本共用的文件小工具：内容摘要、原子写入与 JSON 读写
+#
+# 只依赖标准库，导入时没有副作用；build_artifacts.py 与 lda_sweep.py 都从这里导入。
+
+import os
+import json
+import hashlib
+
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_text_atomic(path, text):
+    """先写同目录下的临时文件再替换，读者只会看到完整的旧文件或新文件。"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path, data):
+    write_text_atomic(path, json.dumps(data, ensure_ascii=False, indent=4))
+
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
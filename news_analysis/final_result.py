@@ -1,39 +1,36 @@
 import pandas as pd
-import json
-import jieba
-import io
-import base64
-from wordcloud import WordCloud
 from collections import Counter
+import os
 import sys
+import json
+from urllib.parse import urlencode
 from datetime import datetime
-import matplotlib.font_manager as fm
+import flask
 import dash
-from dash import dcc, html, dash_table
+from dash import dcc, html, dash_table, Patch
 from dash.dependencies import Input, Output, State
 import plotly.express as px
 import plotly.graph_objects as go
+from preprocess import tokenize_corpus
+from corpus_store import load_corpus
+from news_store import NewsStore, TABLE_COLUMNS
+from synonyms import load_synonym_table
+from fonts import find_font
+from wordcloud_render import WordCloudCache
+from incremental_ingest import IncrementalIngestor
+from topic_inference import get_topic_inferencer
+from metrics import timed_callback, callback_report
+from singleflight import coalesced, clear_all, coalescing_report
 
 # ========================= 0. 自动查找系统字体函数 =========================
 def get_system_font():
-    """自动在系统中查找可用的中文字体。"""
+    """自动在系统中查找可用的中文字体，查找结果缓存在 cache/font.json。"""
     print("--- 正在自动查找系统中可用的中文字体... ---")
-    font_preferences = [
-        'SimHei',          # 黑体 (Windows)
-        'Microsoft YaHei', # 微软雅黑 (Windows)
-        'PingFang SC',     # 苹方 (macOS)
-        'WenQuanYi Zen Hei'# 文泉驿正黑 (Linux)
-    ]
-    
-    for font_name in font_preferences:
-        try:
-            font_path = fm.findfont(fm.FontProperties(family=font_name))
-            if font_path:
-                print(f"--- 成功找到字体: {font_name} @ {font_path} ---")
-                return font_path
-        except Exception:
-            continue
-            
+    font_name, font_path = find_font()
+    if font_path:
+        print(f"--- 成功找到字体: {font_name} @ {font_path} ---")
+        return font_path
+
     print("!!! 未找到指定的中文字体。词云图可能无法正确显示中文。!!!")
     return None
 
@@ -56,27 +53,38 @@ TOPIC_COLORS = {
 }
 
 try:
-    with open('classified_news_data_v2.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    df, article_bodies = load_corpus('classified_news_data_v2.json')
 except FileNotFoundError:
     print("致命错误：'classified_news_data_v2.json' 文件未找到！请确保该文件在脚本的同一目录下。")
     exit()
 
-df = pd.json_normalize(data)
-df.rename(columns={'predicted_topic.id': 'topic_id', 'predicted_topic.probability': 'probability'}, inplace=True)
-df['topic_id'] = df['topic_id'].astype(int)
 df['topic_name'] = df['topic_id'].map(TOPIC_MAP)
-df['time'] = pd.to_datetime(df['time'])
-
-stop_words = {'我们', '的', '了', '是', '在', '也', '等', '该', '将', '为', '以', '对', '和', '中', '月', '日', '年'}
-jieba.setLogLevel('WARN')
-def get_keywords(text):
-    if not isinstance(text, str): return []
-    words = jieba.lcut(text)
-    return [word for word in words if word not in stop_words and len(word) > 1 and not word.isnumeric()]
 
 print("--- 正在对所有新闻内容进行预分词... ---")
-df['keywords'] = df['content'].apply(get_keywords)
+corpus = tokenize_corpus(article_bodies, hashes=getattr(article_bodies, 'hashes', None))
+# 同义词归并默认关闭：matched_synonyms.txt 的标准词多为同义词组的首词，并非语料中的常用写法
+# （如 "人才" 会被计为 "丽都"），直接归并会改写最高频的关键词。设置环境变量 NEWS_SYNONYMS=1 开启
+synonym_table = load_synonym_table() if os.environ.get('NEWS_SYNONYMS') == '1' else None
+store = NewsStore(df, TOPIC_MAP.values(), corpus, synonym_table)
+wordcloud_cache = WordCloudCache(store, SYSTEM_FONT_PATH)
+
+def prerender_default_wordclouds():
+    """后台预渲染默认日期范围下轮播会用到的全部词云图，返回渲染线程。"""
+    return wordcloud_cache.prerender([(store.first_day, store.last_day, topic) for topic in [None] + store.topics])
+
+def replace_store(new_store):
+    """增量导入后整体替换数据层，返回默认词云的预渲染线程。回调每次调用时才读取全局 store，替换对正在处理的请求是原子的。"""
+    global store
+    store = new_store
+    wordcloud_cache.reset(new_store)
+    clear_all()
+    return prerender_default_wordclouds()
+
+# 监视 incoming/news.jsonl，新抓取的新闻无需重启即可出现在仪表盘中
+# 缺少 predicted_topic 的新闻由 lda_k3 模型批量推断主题，模型在第一次需要时才加载
+# 预渲染与监视线程在启动服务时才开始（见第 5 节与 serve.py），导入本模块只加载数据
+ingestor = IncrementalIngestor(lambda: store, replace_store, TOPIC_MAP,
+                               classify=lambda docs: get_topic_inferencer().classify(docs))
 print("--- 数据准备完成！即将启动Web服务... ---")
 
 # ========================= 2. 定义Dash应用布局 =========================
@@ -91,6 +99,83 @@ app.title = "新闻主题动态分析仪表盘"
 min_date = df['time'].min().date()
 max_date = df['time'].max().date()
 
+def build_area_figure(start_date, end_date):
+    """构建完整的主题堆叠面积图，之后的日期变化只通过 Patch 更新曲线数据。"""
+    days, topic_counts = store.topic_counts_by_day(start_date, end_date)
+    
+    area_fig = go.Figure()
+    for i, topic in enumerate(store.topics):
+        area_fig.add_trace(go.Scatter(
+            x=days,
+            y=topic_counts[:, i],
+            mode='lines',
+            stackgroup='one',
+            name=topic,
+            line=dict(width=2, color=TOPIC_COLORS[topic]),
+            fill='tonexty',
+            hovertemplate=f'<b>{topic}</b><br>日期: %{{x|%Y-%m-%d}}<br>数量: %{{y}}<extra></extra>',
+            customdata=[[topic]] * len(days)
+        ))
+    
+    area_fig.update_layout(
+        clickmode='event+select',
+        legend_title_text='点击图例切换',
+        hovermode='x unified',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin={'l': 50, 'r': 30, 't': 30, 'b': 50},
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='right',
+            x=1,
+            bgcolor='rgba(255,255,255,0.7)',
+            bordercolor='rgba(0,0,0,0.1)',
+            borderwidth=1
+        ),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(0,0,0,0.05)',
+            title='日期'
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(0,0,0,0.05)',
+            title='新闻数量'
+        )
+    )
+
+    return area_fig
+
+def build_sentiment_figure(start_date, end_date):
+    """构建完整的情感趋势图（各主题 + 全部主题），之后的日期变化只通过 Patch 更新曲线数据。"""
+    days, topic_scores, overall = store.sentiment_by_day(start_date, end_date)
+    series = [(topic, topic_scores[:, i], 'solid') for i, topic in enumerate(store.topics)]
+    series.append(("全部主题", overall, 'dash'))
+
+    fig = go.Figure()
+    for name, scores, dash_style in series:
+        fig.add_trace(go.Scatter(
+            x=days,
+            y=scores,
+            mode='lines',
+            name=name,
+            connectgaps=True,
+            line=dict(width=2, color=TOPIC_COLORS[name], dash=dash_style),
+            hovertemplate=f'<b>{name}</b><br>日期: %{{x|%Y-%m-%d}}<br>情感得分: %{{y:.3f}}<extra></extra>'
+        ))
+    fig.update_layout(
+        hovermode='x unified',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin={'l': 50, 'r': 30, 't': 10, 'b': 50},
+        legend=dict(orientation='h', y=1.08),
+        xaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.05)'),
+        yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.05)', title='平均情感得分', range=[-1.05, 1.05])
+    )
+    return fig
+
 # 卡片式链接样式
 card_container_style = {
     'display': 'flex',
@@ -150,8 +235,15 @@ app.layout = html.Div(style={
     'backgroundColor': '#f8f9fa',
     'minHeight': '100vh'
 }, children=[
+    dcc.Location(id='page-location', refresh=False),
     dcc.Store(id='current-topic-store', data=None),
     dcc.Store(id='pause-state-store', data=False),
+    # 当前日期范围下各主题的词云、TF-IDF 排行与表格首页，主题轮播只在浏览器端读取
+    dcc.Store(id='wordcloud-bundle-store'),
+    dcc.Store(id='topic-bundle-store'),
+    # 翻页、排序、筛选时发往服务器的表格查询及其结果
+    dcc.Store(id='table-request-store'),
+    dcc.Store(id='table-page-store'),
 
     # 顶部标题栏
     html.Div(style={
@@ -241,14 +333,14 @@ app.layout = html.Div(style={
                         'margin': '0 0 10px 0',
                         'fontWeight': '600'
                     }),
-                    html.P("探索高频词汇之间的关联强度与网络结构。", style={
+                    html.P("探索高频词汇之间的关联强度与网络结构，随所选时间范围与主题实时计算。", style={
                         'fontSize': '14px',
                         'color': '#7f8c8d',
                         'lineHeight': '1.6',
                         'marginBottom': '0'
                     }),
                 ]),
-                html.A("点击查看", href="/assets/word_co-occurrence_network_warm_theme.html", 
+                html.A("点击查看", href=app.get_asset_url('cooccurrence_network.html'),
                        target="_blank", style=card_button_style,
                        id='card-button-1')
             ], style=card_style, id='card-1'),
@@ -499,7 +591,7 @@ app.layout = html.Div(style={
                     })
                 ])
             ]),
-            dcc.Graph(id='stacked-area-chart', style={'height': '400px'})
+            dcc.Graph(id='stacked-area-chart', figure=build_area_figure(min_date, max_date), style={'height': '400px'})
         ]),
         
         # 词云图
@@ -564,6 +656,42 @@ app.layout = html.Div(style={
             ])
         ])
     ]),
+
+    # 关键词 TF-IDF 排行
+    html.Div(style={
+        'marginTop': '30px',
+        'padding': '25px',
+        'backgroundColor': 'white',
+        'borderRadius': '12px',
+        'boxShadow': '0 5px 15px rgba(0,0,0,0.05)',
+        'position': 'relative'
+    }, children=[
+        html.H3(id='tfidf-title', style={
+            'margin': '0 0 20px 0',
+            'fontSize': '20px',
+            'color': '#2c3e50',
+            'fontWeight': '600'
+        }),
+        dcc.Graph(id='tfidf-bar-chart', style={'height': '360px'})
+    ]),
+
+    # 新闻情感趋势
+    html.Div(style={
+        'marginTop': '30px',
+        'padding': '25px',
+        'backgroundColor': 'white',
+        'borderRadius': '12px',
+        'boxShadow': '0 5px 15px rgba(0,0,0,0.05)',
+        'position': 'relative'
+    }, children=[
+        html.H3("新闻情感趋势", style={
+            'margin': '0 0 20px 0',
+            'fontSize': '20px',
+            'color': '#2c3e50',
+            'fontWeight': '600'
+        }),
+        dcc.Graph(id='sentiment-line-chart', figure=build_sentiment_figure(min_date, max_date), style={'height': '360px'})
+    ]),
     
     # 新闻表格区域
     html.Div(style={
@@ -649,9 +777,14 @@ app.layout = html.Div(style={
                     'cursor': 'pointer'
                 }
             ],
+            page_current=0,
             page_size=10,
-            sort_action='native',
-            filter_action='native',
+            page_action='custom',
+            sort_action='custom',
+            sort_mode='single',
+            sort_by=[],
+            filter_action='custom',
+            filter_query='',
             style_table={
                 'overflowX': 'auto',
                 'borderRadius': '8px',
@@ -683,6 +816,19 @@ app.layout = html.Div(style={
 
 # ========================= 3. 定义交互逻辑 (回调函数) =========================
 
+# 页面加载时按当前数据（含增量导入的新闻）设置日期选择范围
+@app.callback(
+    Output('date-picker-range', 'min_date_allowed'),
+    Output('date-picker-range', 'max_date_allowed'),
+    Output('date-picker-range', 'start_date'),
+    Output('date-picker-range', 'end_date'),
+    Input('page-location', 'pathname')
+)
+def update_date_bounds(pathname):
+    first_day = store.first_day.strftime('%Y-%m-%d')
+    last_day = store.last_day.strftime('%Y-%m-%d')
+    return first_day, last_day, first_day, last_day
+
 # 卡片悬停效果
 app.clientside_callback(
     """
@@ -722,6 +868,20 @@ app.clientside_callback(
     prevent_initial_call=True
 )
 
+# 共现网络卡片链接到实时网络页面，页面地址携带当前日期范围与主题；链接只在浏览器端拼接
+app.clientside_callback(
+    """
+    function(startDate, endDate, topic) {
+        var params = new URLSearchParams({start: startDate || '', end: endDate || '', topic: topic || ''});
+        return '%s?' + params.toString();
+    }
+    """ % app.get_asset_url('cooccurrence_network.html'),
+    Output('card-button-1', 'href'),
+    Input('date-picker-range', 'start_date'),
+    Input('date-picker-range', 'end_date'),
+    Input('current-topic-store', 'data')
+)
+
 # 暂停/播放按钮逻辑
 @app.callback(
     Output('pause-state-store', 'data'),
@@ -773,8 +933,29 @@ def toggle_pause_state(n_clicks, is_paused):
         
     return new_pause_state, new_pause_state, style
 
-# 主题切换逻辑
-@app.callback(
+# 主题切换与轮播在浏览器端完成：按钮、面积图点击和定时轮播都只改写 current-topic-store，不访问服务器
+# 页面不可见（切到其他标签页、锁屏）时轮播暂停，回到页面后从当前主题继续
+ALL_TOPICS_KEY = "全部主题"
+ROTATION_TOPICS = [None] + list(TOPIC_MAP.values())
+
+app.clientside_callback(
+    """
+    function(clickData, btnAll, btn1, btn2, btn3, nIntervals, currentTopic, isPaused) {
+        var ctx = window.dash_clientside.callback_context;
+        var triggered = ctx.triggered.length ? ctx.triggered[0].prop_id.split('.')[0] : '';
+        var topics = %s;
+        if (triggered === 'stacked-area-chart' && clickData) {
+            return clickData.points[0].customdata[0];
+        } else if (triggered === 'btn-all') {
+            return null;
+        } else if (/^btn-[0-9]+$/.test(triggered)) {
+            return topics[parseInt(triggered.split('-')[1], 10)];
+        } else if (triggered === 'wordcloud-interval' && !isPaused && !document.hidden) {
+            return topics[(topics.indexOf(currentTopic) + 1) %% topics.length];
+        }
+        return window.dash_clientside.no_update;
+    }
+    """ % json.dumps(ROTATION_TOPICS, ensure_ascii=False),
     Output('current-topic-store', 'data'),
     Input('stacked-area-chart', 'clickData'),
     Input('btn-all', 'n_clicks'),
@@ -785,130 +966,320 @@ def toggle_pause_state(n_clicks, is_paused):
     State('current-topic-store', 'data'),
     State('pause-state-store', 'data')
 )
-def update_current_topic(clickData, btn_all, btn1, btn2, btn3, n_intervals, current_topic, is_paused):
-    ctx = dash.callback_context
-    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else 'initial_load'
-
-    if triggered_id == 'stacked-area-chart' and clickData:
-        return clickData['points'][0]['customdata'][0]
-    elif triggered_id == 'btn-all':
-        return None
-    elif triggered_id in ['btn-1', 'btn-2', 'btn-3']:
-        return TOPIC_MAP[int(triggered_id.split('-')[1])]
-    elif triggered_id == 'wordcloud-interval' and not is_paused:
-        topic_list = [None] + list(TOPIC_MAP.values())
-        try:
-            current_index = topic_list.index(current_topic)
-            next_index = (current_index + 1) % len(topic_list)
-        except ValueError:
-            next_index = 0
-        return topic_list[next_index]
-    else:
-        return dash.no_update
 
-# 主仪表盘更新逻辑
+# 只依赖日期范围的回调经 singleflight 合并：同一进程内同时到达的相同日期范围只计算一次，结果保留 COALESCE_TTL 秒
+COALESCE_TTL = 30
+
+def date_window_key(start_date, end_date, *rest):
+    """把日期参数归一化为 YYYY-MM-DD，作为合并与缓存的键。"""
+    return (pd.Timestamp(start_date).strftime('%Y-%m-%d'), pd.Timestamp(end_date).strftime('%Y-%m-%d')) + rest
+
+# 面积图只依赖日期范围：日期变化时以 Patch 只更新各条曲线的数据，不重发整个图表
 @app.callback(
     Output('stacked-area-chart', 'figure'),
-    Output('wordcloud-title', 'children'),
-    Output('word-cloud-image', 'src'),
-    Output('news-table-title', 'children'),
-    Output('news-table', 'data'),
     Input('date-picker-range', 'start_date'),
     Input('date-picker-range', 'end_date'),
-    Input('current-topic-store', 'data')
+    prevent_initial_call=True
 )
-def update_dashboard(start_date, end_date, current_topic):
-    dff_time_filtered = df[(df['time'] >= start_date) & (df['time'] <= end_date)]
-    if current_topic:
-        dff_final_filtered = dff_time_filtered[dff_time_filtered['topic_name'] == current_topic]
-    else:
-        dff_final_filtered = dff_time_filtered
+@timed_callback
+@coalesced(date_window_key, COALESCE_TTL)
+def update_area_chart(start_date, end_date):
+    days, topic_counts = store.topic_counts_by_day(start_date, end_date)
+    x = days.strftime('%Y-%m-%d').tolist()
+    patched_fig = Patch()
+    for i, topic in enumerate(store.topics):
+        patched_fig['data'][i]['x'] = x
+        patched_fig['data'][i]['y'] = topic_counts[:, i].tolist()
+        patched_fig['data'][i]['customdata'] = [[topic]] * len(x)
+    return patched_fig
 
-    # 1. 更新面积图
-    topic_counts = dff_time_filtered.groupby([dff_time_filtered['time'].dt.date, 'topic_name']).size().reset_index(name='count')
-    
-    area_fig = go.Figure()
-    for topic in TOPIC_MAP.values():
-        topic_data = topic_counts[topic_counts['topic_name'] == topic]
-        area_fig.add_trace(go.Scatter(
-            x=topic_data['time'],
-            y=topic_data['count'],
-            mode='lines',
-            stackgroup='one',
-            name=topic,
-            line=dict(width=2, color=TOPIC_COLORS[topic]),
-            fill='tonexty',
-            hovertemplate=f'<b>{topic}</b><br>日期: %{{x|%Y-%m-%d}}<br>数量: %{{y}}<extra></extra>',
-            customdata=[[topic]] * len(topic_data)
-        ))
-    
-    area_fig.update_layout(
-        clickmode='event+select',
-        legend_title_text='点击图例切换',
-        hovermode='x unified',
+# 词云与 TF-IDF 排行：日期范围变化时一次算出所有主题的结果存入浏览器，切换主题只在本地取用
+# 词云渲染较慢，单独一个回调，TF-IDF 与表格首页不必等它完成
+TFIDF_TOP_K = 20
+
+def build_tfidf_chart(start_date, end_date, topic):
+    """按日期范围与主题从 TF-IDF 索引中查询，返回 (标题, 柱状图)。"""
+    rows = store.top_tfidf(start_date, end_date, topic, TFIDF_TOP_K)
+    title = f"「{topic}」主题关键词 TF-IDF 排行" if topic else "「全部主题」关键词 TF-IDF 排行"
+
+    fig = go.Figure(go.Bar(
+        x=[row['word'] for row in rows],
+        y=[row['tfidf'] for row in rows],
+        customdata=[row['freq'] for row in rows],
+        marker_color=TOPIC_COLORS[topic or ALL_TOPICS_KEY],
+        hovertemplate='<b>%{x}</b><br>TF-IDF: %{y:.3f}<br>词频: %{customdata}<extra></extra>'
+    ))
+    fig.update_layout(
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
-        margin={'l': 50, 'r': 30, 't': 30, 'b': 50},
-        legend=dict(
-            orientation='h',
-            yanchor='bottom',
-            y=1.02,
-            xanchor='right',
-            x=1,
-            bgcolor='rgba(255,255,255,0.7)',
-            bordercolor='rgba(0,0,0,0.1)',
-            borderwidth=1
-        ),
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(0,0,0,0.05)',
-            title='日期'
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(0,0,0,0.05)',
-            title='新闻数量'
-        )
+        margin={'l': 50, 'r': 30, 't': 10, 'b': 60},
+        xaxis=dict(tickangle=-30),
+        yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.05)', title='TF-IDF')
     )
+    return title, fig
 
-    # 2. 更新词云图
-    all_keywords = [word for sublist in dff_final_filtered['keywords'] for word in sublist]
-    wordcloud_title = f"「{current_topic}」主题核心词" if current_topic else "「全部主题」核心词"
-    wordcloud_src = ""
-    
-    text_for_wordcloud = " ".join(all_keywords)
-
-    if text_for_wordcloud:
+@app.callback(
+    Output('wordcloud-bundle-store', 'data'),
+    Input('date-picker-range', 'start_date'),
+    Input('date-picker-range', 'end_date')
+)
+@timed_callback
+@coalesced(date_window_key, COALESCE_TTL)
+def update_wordcloud_bundle(start_date, end_date):
+    # 优先取渲染缓存，未命中时由预计算的词频向量渲染；图片按内容寻址，浏览器取过一次后轮播不再请求
+    bundle = {}
+    for topic in ROTATION_TOPICS:
+        src = ""
         try:
-            wc = WordCloud(
-                font_path=SYSTEM_FONT_PATH,
-                width=800,
-                height=500,
-                background_color=None,
-                mode="RGBA",
-                max_words=100,
-                collocations=False,
-                colormap='viridis',
-                prefer_horizontal=0.9,
-                relative_scaling=0.5
-            )
-            wc.generate(text_for_wordcloud)
-            img_buffer = io.BytesIO()
-            wc.to_image().save(img_buffer, format='PNG')
-            wordcloud_src = f"data:image/png;base64,{base64.b64encode(img_buffer.getvalue()).decode()}"
+            image = wordcloud_cache.get(start_date, end_date, topic)
+            if image:
+                src = wordcloud_url(image, start_date, end_date, topic)
         except Exception as e:
             print(f"!!! 生成词云时出错: {e} !!!")
+        title = f"「{topic}」主题核心词" if topic else "「全部主题」核心词"
+        bundle[topic or ALL_TOPICS_KEY] = {'title': title, 'src': src}
+    return bundle
+
+@app.callback(
+    Output('topic-bundle-store', 'data'),
+    Input('date-picker-range', 'start_date'),
+    Input('date-picker-range', 'end_date'),
+    State('news-table', 'page_size')
+)
+@timed_callback
+@coalesced(date_window_key, COALESCE_TTL)
+def update_topic_bundle(start_date, end_date, page_size):
+    bundle = {}
+    for topic in ROTATION_TOPICS:
+        tfidf_title, tfidf_figure = build_tfidf_chart(start_date, end_date, topic)
+        table_title, table_data, page_count = news_table_page(start_date, end_date, topic, 0, page_size)
+        bundle[topic or ALL_TOPICS_KEY] = {
+            'tfidf_title': tfidf_title, 'tfidf_figure': tfidf_figure,
+            'table_title': table_title, 'table_data': table_data, 'page_count': page_count
+        }
+    return bundle
+
+# 从浏览器中的结果里取出当前主题的词云与 TF-IDF 排行；新结果到达时顺带预载全部词云图片
+app.clientside_callback(
+    """
+    function(bundle, topic) {
+        var noUpdate = window.dash_clientside.no_update;
+        if (!bundle) {
+            return [noUpdate, noUpdate];
+        }
+        var triggered = window.dash_clientside.callback_context.triggered.map(function (t) { return t.prop_id; });
+        if (triggered.indexOf('wordcloud-bundle-store.data') >= 0) {
+            Object.keys(bundle).forEach(function (key) {
+                if (bundle[key].src) {
+                    new Image().src = bundle[key].src;
+                }
+            });
+        }
+        var entry = bundle[topic || '%s'];
+        return entry ? [entry.title, entry.src] : [noUpdate, noUpdate];
+    }
+    """ % ALL_TOPICS_KEY,
+    Output('wordcloud-title', 'children'),
+    Output('word-cloud-image', 'src'),
+    Input('wordcloud-bundle-store', 'data'),
+    Input('current-topic-store', 'data')
+)
+
+app.clientside_callback(
+    """
+    function(bundle, topic) {
+        var entry = bundle && bundle[topic || '%s'];
+        if (!entry) {
+            return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+        }
+        return [entry.tfidf_title, entry.tfidf_figure];
+    }
+    """ % ALL_TOPICS_KEY,
+    Output('tfidf-title', 'children'),
+    Output('tfidf-bar-chart', 'figure'),
+    Input('topic-bundle-store', 'data'),
+    Input('current-topic-store', 'data')
+)
+
+# 情感趋势：逐日平均情感得分由预先统计的 (日期 × 主题) 得分立方体直接切片得到；
+# 与面积图一样，日期变化时以 Patch 只更新各条曲线的数据（没有新闻的日期为 NaN，序列化为 null）
+@app.callback(
+    Output('sentiment-line-chart', 'figure'),
+    Input('date-picker-range', 'start_date'),
+    Input('date-picker-range', 'end_date'),
+    prevent_initial_call=True
+)
+@timed_callback
+@coalesced(date_window_key, COALESCE_TTL)
+def update_sentiment_chart(start_date, end_date):
+    days, topic_scores, overall = store.sentiment_by_day(start_date, end_date)
+    x = days.strftime('%Y-%m-%d').tolist()
+    patched_fig = Patch()
+    # 曲线顺序与 build_sentiment_figure 一致：各主题在前，全部主题在最后
+    for i, scores in enumerate(list(topic_scores.T) + [overall]):
+        patched_fig['data'][i]['x'] = x
+        patched_fig['data'][i]['y'] = scores.tolist()
+    return patched_fig
+
+# 新闻表格：服务端完成筛选、排序与分页，只返回当前页
+TABLE_FILTER_OPERATORS = [['ge ', '>='], ['le ', '<='], ['lt ', '<'], ['gt ', '>'], ['ne ', '!='], ['eq ', '='],
+                          ['contains '], ['datestartswith ']]
+# 表格显示列 -> 数据列（时间与标题列按原始值筛选和排序）
+TABLE_SOURCE_COLUMNS = {'time_str': 'time', 'title_link': 'title', 'topic_name': 'topic_name', 'probability': 'probability'}
+
+def split_filter_part(filter_part):
+    """把 DataTable 的单个筛选条件（如 `{probability} > 0.9`）拆成 (列名, 运算符, 值)。"""
+    for operator_type in TABLE_FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+                value_part = value_part.strip()
+                v0 = value_part[0] if value_part else ''
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+                    value = value_part[1: -1].replace('\\' + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+                return name, operator_type[0].strip(), value
+    return None, None, None
+
+def news_table_page(start_date, end_date, topic, page_current, page_size, sort_by=None, filter_query=''):
+    """查询新闻表格的一页，返回 (标题, 当前页数据, 总页数)。"""
+    filters = []
+    for filter_part in (filter_query or '').split(' && '):
+        column, operator, value = split_filter_part(filter_part)
+        if column in TABLE_SOURCE_COLUMNS:
+            filters.append((TABLE_SOURCE_COLUMNS[column], operator, value))
+    sort_columns = [(TABLE_SOURCE_COLUMNS[s['column_id']], s['direction'] == 'asc')
+                    for s in (sort_by or []) if s['column_id'] in TABLE_SOURCE_COLUMNS]
+
+    try:
+        page_rows, total = store.query_table(start_date, end_date, topic, filters, sort_columns, page_current, page_size)
+    except (ValueError, TypeError) as e:
+        print(f"!!! 表格筛选条件无效: {e} !!!")
+        page_rows, total = store.df.iloc[0:0], 0
+
+    table_title = f"「{topic}」主题相关新闻列表" if topic else "全部主题相关新闻列表"
+    table_title += f"（共 {total} 条）"
+    table_data = page_rows[TABLE_COLUMNS].to_dict('records')
+    page_count = max(1, -(-total // page_size))
+    return table_title, table_data, page_count
+
+# 未排序、未筛选的第一页直接取自浏览器中的 topic-bundle-store；翻页、排序或筛选时才请求服务器
+app.clientside_callback(
+    """
+    function(topic, bundle, pageCurrent, sortBy, filterQuery, pageResult, startDate, endDate, pageSize) {
+        var noUpdate = window.dash_clientside.no_update;
+        var triggered = window.dash_clientside.callback_context.triggered.map(function (t) { return t.prop_id; });
+        if (triggered.indexOf('table-page-store.data') >= 0) {
+            if (!pageResult) {
+                return [noUpdate, noUpdate, noUpdate, noUpdate, noUpdate];
+            }
+            return [pageResult.title, pageResult.data, pageResult.page_count, pageResult.page_current, noUpdate];
+        }
+        // 除翻页外的任何变化都回到第一页
+        var page = (triggered.length === 1 && triggered[0] === 'news-table.page_current') ? pageCurrent : 0;
+        if (page === 0 && !(sortBy && sortBy.length) && !filterQuery) {
+            var entry = bundle && bundle[topic || '%s'];
+            if (!entry) {
+                return [noUpdate, noUpdate, noUpdate, noUpdate, noUpdate];
+            }
+            return [entry.table_title, entry.table_data, entry.page_count, 0, noUpdate];
+        }
+        return [noUpdate, noUpdate, noUpdate, page, {
+            start: startDate, end: endDate, topic: topic || null, page: page, page_size: pageSize,
+            sort_by: sortBy || [], filter_query: filterQuery || ''
+        }];
+    }
+    """ % ALL_TOPICS_KEY,
+    Output('news-table-title', 'children'),
+    Output('news-table', 'data'),
+    Output('news-table', 'page_count'),
+    Output('news-table', 'page_current'),
+    Output('table-request-store', 'data'),
+    Input('current-topic-store', 'data'),
+    Input('topic-bundle-store', 'data'),
+    Input('news-table', 'page_current'),
+    Input('news-table', 'sort_by'),
+    Input('news-table', 'filter_query'),
+    Input('table-page-store', 'data'),
+    State('date-picker-range', 'start_date'),
+    State('date-picker-range', 'end_date'),
+    State('news-table', 'page_size')
+)
+
+# 新闻表格：服务端完成筛选、排序与分页，只返回当前页
+@app.callback(
+    Output('table-page-store', 'data'),
+    Input('table-request-store', 'data'),
+    prevent_initial_call=True
+)
+@timed_callback
+def update_news_table(request):
+    table_title, table_data, page_count = news_table_page(
+        request['start'], request['end'], request['topic'], request['page'], request['page_size'],
+        request['sort_by'], request['filter_query'])
+    return {'title': table_title, 'data': table_data, 'page_count': page_count, 'page_current': request['page']}
+
+# ========================= 4. 词云图片与共现网络路由 =========================
+# 回调只返回短 URL，图片本身按内容摘要寻址，浏览器可长期缓存，重复访问只需 304 或直接命中本地缓存
+def wordcloud_url(image, start_date, end_date, topic):
+    start, end, topic = wordcloud_cache.make_key(start_date, end_date, topic)[:3]
+    query = urlencode({'start': start, 'end': end, 'topic': topic or ''})
+    return app.get_relative_path(f"/wordcloud/{image.digest}.png?{query}")
+
+@app.server.route('/wordcloud/<digest>.png')
+def serve_wordcloud(digest):
+    image = wordcloud_cache.by_digest(digest)
+    if image is None:
+        # 图片已被淘汰出缓存，或由其他工作进程渲染：按 URL 中的查询参数重新取得，同一数据层上得到的图片相同；
+        # 只有数据已更新、窗口内容变化时摘要才会不同，此时重定向到新图片
+        args = flask.request.args
+        if 'start' not in args or 'end' not in args:
+            flask.abort(404)
+        topic = args.get('topic') or None
+        try:
+            image = wordcloud_cache.get(args['start'], args['end'], topic)
+        except ValueError:
+            flask.abort(400)
+        if image is None:
+            flask.abort(404)
+        if image.digest != digest:
+            return flask.redirect(wordcloud_url(image, args['start'], args['end'], topic))
+
+    response = flask.Response(image.png, mimetype='image/png')
+    response.set_etag(image.digest)
+    response.cache_control.public = True
+    response.cache_control.max_age = 365 * 24 * 3600
+    response.cache_control.immutable = True
+    return response.make_conditional(flask.request)
+
+# 共现网络以 JSON 提供给 assets/cooccurrence_network.html，按请求的日期范围与主题对窗口内的词序列实时统计；
+# 耗时与窗口内的词数成正比，相同参数的请求经合并层共用结果
+@coalesced(date_window_key, COALESCE_TTL)
+def cooccurrence_data(start_date, end_date, topic):
+    return store.cooccurrence_network(start_date, end_date, topic)
 
-    # 3. 更新新闻表格
-    dff_table = dff_final_filtered.copy().sort_values('time', ascending=False)
-    table_title = f"「{current_topic}」主题相关新闻列表" if current_topic else "全部主题相关新闻列表"
-    dff_table['time_str'] = dff_table['time'].dt.strftime('%Y-%m-%d %H:%M')
-    dff_table['title_link'] = dff_table.apply(lambda row: f"[{row['title']}]({row['url']})", axis=1)
-    columns_to_display = ['time_str', 'title_link', 'topic_name', 'probability']
-    table_data = dff_table[columns_to_display].to_dict('records')
+@app.server.route('/cooccurrence.json')
+def serve_cooccurrence():
+    args = flask.request.args
+    try:
+        network = cooccurrence_data(args.get('start') or store.first_day, args.get('end') or store.last_day,
+                                    args.get('topic') or None)
+    except ValueError:
+        flask.abort(400)
+    return flask.jsonify(network)
 
-    return area_fig, wordcloud_title, wordcloud_src, table_title, table_data
+@app.server.route('/metrics')
+def serve_metrics():
+    return flask.jsonify({'callbacks': callback_report(), 'coalescing': coalescing_report()})
 
-# ========================= 4. 运行Dash应用 =========================
+# ========================= 5. 运行Dash应用 =========================
+# 开发模式：单进程并启用调试工具；生产环境请使用 serve.py 以多个工作进程提供服务
 if __name__ == '__main__':
+    prerender_default_wordclouds()
+    ingestor.start()
     app.run(debug=True, dev_tools_ui=True, dev_tools_hot_reload=True)
\ No newline at end of file
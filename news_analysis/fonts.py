@@ -0,0 +1,98 @@
+# fonts.py - 中文字体查找结果的持久化缓存与字体对象的进程级缓存
+#
+# 查找字体要导入 matplotlib.font_manager 并逐个尝试候选字体，字体缓存缺失时 matplotlib 还会扫描全部系统字体重建。
+# 找到的路径写入 cache/font.json，之后启动时只要候选列表不变、字体文件未改动，就直接使用该路径。
+# 渲染词云时 WordCloud 会为每个词的每个候选字号重新打开一次字体文件，get_font 按 (路径, 字号) 缓存已加载的字体对象。
+
+import os
+import json
+from functools import lru_cache
+
+from PIL import ImageFont
+
+FONT_CACHE_PATH = os.path.join('cache', 'font.json')
+# get_font 最多保留的 (路径, 字号) 组合数
+FONT_OBJECT_CACHE_SIZE = 512
+
+FONT_PREFERENCES = [
+    'SimHei',          # 黑体 (Windows)
+    'Microsoft YaHei', # 微软雅黑 (Windows)
+    'PingFang SC',     # 苹方 (macOS)
+    'WenQuanYi Zen Hei'# 文泉驿正黑 (Linux)
+]
+
+
+def _font_signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _load_cached_font(preferences, cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['preferences'] != list(preferences) or cached['signature'] != _font_signature(cached['path']):
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return cached['family'], cached['path']
+
+
+def _save_cached_font(preferences, family, path, cache_path):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'preferences': list(preferences), 'family': family, 'path': path,
+                   'signature': _font_signature(path)}, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+
+def search_font(preferences=FONT_PREFERENCES):
+    """通过 matplotlib 依次查找候选字体，返回 (字体名, 路径, 是否确实找到该字体)。
+
+    候选字体都不存在时与 findfont 的默认行为一致，退回 matplotlib 的默认字体，此时第三项为 False。
+    """
+    import matplotlib.font_manager as fm
+
+    for font_name in preferences:
+        try:
+            return font_name, str(fm.findfont(fm.FontProperties(family=font_name), fallback_to_default=False)), True
+        except Exception:
+            continue
+    for font_name in preferences:
+        try:
+            font_path = fm.findfont(fm.FontProperties(family=font_name))
+            if font_path:
+                return font_name, str(font_path), False
+        except Exception:
+            continue
+    return None, None, False
+
+
+def find_font(preferences=FONT_PREFERENCES, cache_path=FONT_CACHE_PATH):
+    """返回 (字体名, 路径)，优先读取上次查找的结果；缓存失效时重新查找并写回。
+
+    只缓存确实找到的候选字体，退回默认字体时每次启动都重新查找，安装中文字体后即可生效。
+    """
+    cached = _load_cached_font(preferences, cache_path)
+    if cached is not None:
+        return cached
+    family, path, matched = search_font(preferences)
+    if matched:
+        try:
+            _save_cached_font(preferences, family, path, cache_path)
+        except OSError as e:
+            print(f"!!! 写入字体缓存失败: {e} !!!")
+    return family, path
+
+
+@lru_cache(maxsize=FONT_OBJECT_CACHE_SIZE)
+def get_font(font_path, size):
+    """按 (路径, 字号) 缓存的 FreeTypeFont。
+
+    一种字体在一种画布尺寸下用到的字号不超过画布高度，FreeType 以 mmap 方式读取字体文件，各字号的对象共享同一份
+    文件页面，每个对象的私有内存只有约 2KB。同一对象可在多个渲染线程间共享：Pillow 的 FreeType 扩展模块
+    PIL/_imagingft 从不释放 GIL（`nm -D _imagingft*.so` 中没有 PyEval_SaveThread，而 PIL/_imaging 中有），
+    对字体对象的每次调用都在持有 GIL 时完整执行。自由线程（无 GIL）构建的 Python 不满足这一前提。
+    """
+    return ImageFont.truetype(font_path, size)
@@ -0,0 +1,169 @@
+# incremental_ingest.py - 增量导入：监视只追加写入的 JSONL 文件，把新抓取的新闻合并进运行中的仪表盘
+#
+# 每行一条新闻，字段与 classified_news_data_v2.json 相同：
+#   {"title": ..., "url": ..., "time": "2025-07-10 09:30:00", "content": ..., "predicted_topic": {"id": 1, "probability": 0.98}}
+# 缺少 predicted_topic 的新闻交给 classify 函数打标签；未提供 classify 时跳过。
+# 每条新闻单独校验，时间无法解析或主题标签格式不对的新闻打印原因后跳过，不影响同一批中的其他新闻。
+# 已导入的文件偏移量只保存在内存中，仪表盘重启后会重新导入整个文件（按 URL 去重）；
+# 偏移量在新的数据层交给 on_update 之后才前移，导入中途出错时下次轮询重新读取这一批。
+
+import os
+import json
+import time
+import threading
+
+import pandas as pd
+
+from preprocess import segment_texts, encode_keywords
+
+INCOMING_JSONL = os.path.join('incoming', 'news.jsonl')
+POLL_INTERVAL = 10
+
+
+class IncrementalIngestor:
+    """轮询 JSONL 文件的新增行，分词、分类后生成合并了新文章的 NewsStore 并交给 on_update。"""
+
+    def __init__(self, get_store, on_update, topic_map, path=INCOMING_JSONL, interval=POLL_INTERVAL,
+                 classify=None):
+        self.get_store = get_store
+        self.on_update = on_update
+        self.topic_map = topic_map
+        self.path = path
+        self.interval = interval
+        self.classify = classify
+        self._offset = 0
+        self._known_urls = None
+
+    def read_new_records(self):
+        """读取上次位置之后的完整行，返回 (新闻列表, 读到的位置)；文件被截断或替换时从头读取。
+
+        不移动 self._offset，由调用者在这批新闻处理完之后提交。
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return [], self._offset
+        if size < self._offset:
+            self._offset = 0
+        if size == self._offset:
+            return [], self._offset
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+        # 只处理以换行结尾的完整行，写了一半的行留到下次
+        end = chunk.rfind(b'\n') + 1
+        records = []
+        for line in chunk[:end].decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                print(f"!!! 跳过无法解析的增量新闻: {e} !!!")
+        return records, self._offset + end
+
+    @staticmethod
+    def _reject(record, reason):
+        url = record.get('url') if isinstance(record, dict) else None
+        print(f"!!! 跳过增量新闻{' ' + url if isinstance(url, str) and url else ''}: {reason} !!!")
+        return None
+
+    def parse_record(self, record):
+        """校验并规范单条新闻：时间解析为 Timestamp，主题标签为 {'id': 已知主题, 'probability': 浮点数} 或 None。
+
+        字段不合法时打印原因并返回 None。
+        """
+        if not isinstance(record, dict):
+            return self._reject(record, "不是 JSON 对象")
+        url = record.get('url')
+        if not isinstance(url, str) or not url:
+            return self._reject(record, "缺少 url")
+        try:
+            time_value = pd.Timestamp(record.get('time'))
+        except (TypeError, ValueError):
+            time_value = pd.NaT
+        if pd.isna(time_value):
+            return self._reject(record, f"无法解析的时间 {record.get('time')!r}")
+        if time_value.tzinfo is not None:
+            time_value = time_value.tz_localize(None)
+
+        label = record.get('predicted_topic')
+        if label:
+            try:
+                label = {'id': int(label['id']), 'probability': float(label['probability'])}
+            except (TypeError, KeyError, ValueError):
+                return self._reject(record, f"主题标签格式不正确 {record.get('predicted_topic')!r}")
+            if label['id'] not in self.topic_map:
+                return self._reject(record, f"未知的主题编号 {label['id']}")
+        return {
+            'title': record.get('title') if isinstance(record.get('title'), str) else '',
+            'url': url,
+            'time': time_value,
+            'content': record.get('content') if isinstance(record.get('content'), str) else '',
+            'predicted_topic': label or None,
+        }
+
+    def ingest(self, records):
+        """把一批新闻合并进数据层，返回实际新增的条数。"""
+        store = self.get_store()
+        if self._known_urls is None:
+            self._known_urls = set(store.df['url'].astype(str))
+        fresh, seen = [], set()
+        for record in records:
+            record = self.parse_record(record)
+            if record is None or record['url'] in self._known_urls or record['url'] in seen:
+                continue
+            seen.add(record['url'])
+            fresh.append(record)
+        if not fresh:
+            return 0
+
+        contents = [r['content'] for r in fresh]
+        # 在后台线程中单进程分词：从多线程的服务进程中 fork 进程池，可能因其他线程持有的锁而死锁；每批新闻也不多
+        keywords, sentiment = segment_texts(contents, workers=1)
+        labels = [r['predicted_topic'] for r in fresh]
+        unlabeled = [i for i, label in enumerate(labels) if not label]
+        if unlabeled and self.classify is not None:
+            for i, (topic_id, probability) in zip(unlabeled, self.classify([keywords[i] for i in unlabeled])):
+                labels[i] = {'id': topic_id, 'probability': probability}
+        keep = [i for i, label in enumerate(labels) if label]
+        if len(keep) < len(fresh):
+            print(f"!!! {len(fresh) - len(keep)} 条增量新闻缺少主题标签，已跳过 !!!")
+        if not keep:
+            return 0
+
+        df_new = pd.DataFrame({
+            'title': [fresh[i]['title'] for i in keep],
+            'url': [fresh[i]['url'] for i in keep],
+            'time': pd.DatetimeIndex([fresh[i]['time'] for i in keep]),
+            'topic_id': [int(labels[i]['id']) for i in keep],
+            'probability': [float(labels[i]['probability']) for i in keep],
+        })
+        df_new['topic_name'] = df_new['topic_id'].map(self.topic_map)
+        merged = store.extended(df_new, encode_keywords([keywords[i] for i in keep], sentiment[keep]))
+        self.on_update(merged)
+        self._known_urls.update(df_new['url'])
+        return len(keep)
+
+    def poll(self):
+        records, end = self.read_new_records()
+        added = self.ingest(records) if records else 0
+        # ingest 出错时不会执行到这里，偏移量不变，下次轮询重新读取同一批
+        self._offset = end
+        if added:
+            print(f"--- 已增量导入 {added} 条新闻 ---")
+        return added
+
+    def start(self):
+        """启动后台轮询线程并返回该线程。"""
+        def worker():
+            while True:
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"!!! 增量导入出错: {e} !!!")
+                time.sleep(self.interval)
+
+        thread = threading.Thread(target=worker, name='incremental-ingest', daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,224 @@
+# lda_sweep.py - 选择主题数 K：多进程并行训练一组 K 值的 LDA 模型，并计算各自的 C_v 一致性得分
+# 用法: python lda_sweep.py [K_MIN K_MAX] [--step S] [--workers N] [--passes P] [--force]
+#
+# 语料与 lda_k3 相同：classified_news_data_v2.json 的正文经分词缓存得到关键词，再用 lda_k3.dict 转为词袋。
+# 词袋按 CSR 三列保存在 cache/lda/bow/（indptr.npy / indices.npy / data.npy，meta.json 最后写入），
+# 各训练进程内存映射读取同一份文件，不经进程间传输。
+# 每个 K 的模型保存为 cache/lda/models/lda_k{K}.model，得分记录在 cache/lda/scores.json；
+# 语料、词典与训练参数均未变化且模型文件仍在的 K 直接复用，再次扫描只训练新增的 K。
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy import sparse
+
+from fileio import file_digest, read_json, write_json_atomic
+from preprocess import cache_signature, default_workers, load_token_cache
+
+CORPUS_JSON = 'classified_news_data_v2.json'
+LDA_DICT_PATH = 'lda_k3.dict'
+SWEEP_DIR = os.path.join('cache', 'lda')
+BOW_DIR = os.path.join(SWEEP_DIR, 'bow')
+MODEL_DIR = os.path.join(SWEEP_DIR, 'models')
+SCORES_PATH = os.path.join(SWEEP_DIR, 'scores.json')
+
+# 与 lda_k3.model 的训练参数一致
+LDA_PARAMS = {
+    'passes': 20,
+    'iterations': 50,
+    'chunksize': 2000,
+    'alpha': 'auto',
+    'eta': 'auto',
+    'random_state': 42,
+}
+DEFAULT_K_RANGE = (2, 10)
+
+
+# ========================= 1. 内存映射的词袋语料 =========================
+def bow_signature(hashes, dict_path=LDA_DICT_PATH):
+    """由分词缓存签名、词典文件摘要和各篇正文摘要组成的词袋签名。"""
+    h = hashlib.sha1()
+    h.update(f"tokens={cache_signature()};dict={file_digest(dict_path)}".encode('utf-8'))
+    h.update(np.ascontiguousarray(hashes, dtype=np.uint8).tobytes())
+    return h.hexdigest()
+
+
+def load_bow(signature, bow_dir=BOW_DIR):
+    """内存映射读取词袋缓存，返回 (文档 × 词) CSR 矩阵；缓存不存在或签名不符时返回 None。"""
+    try:
+        meta = read_json(os.path.join(bow_dir, 'meta.json'))
+        if meta.get('signature') != signature:
+            return None
+        column = lambda name: np.load(os.path.join(bow_dir, f'{name}.npy'), mmap_mode='r')
+        indptr, indices, data = column('indptr'), column('indices'), column('data')
+    except (OSError, ValueError):
+        return None
+    if len(indptr) != meta['n_docs'] + 1 or len(indices) != meta['nnz'] or len(data) != meta['nnz']:
+        return None
+    return sparse.csr_matrix((data, indices, indptr), shape=(meta['n_docs'], meta['n_terms']), copy=False)
+
+
+def save_bow(bow, signature, bow_dir=BOW_DIR):
+    os.makedirs(bow_dir, exist_ok=True)
+    meta_path = os.path.join(bow_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    for name in ('indptr', 'indices', 'data'):
+        path = os.path.join(bow_dir, f'{name}.npy')
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, getattr(bow, name))
+        os.replace(tmp_path, path)
+    write_json_atomic(meta_path, {'signature': signature, 'n_docs': bow.shape[0], 'n_terms': bow.shape[1],
+                                  'nnz': int(bow.nnz)})
+
+
+def tokenized_corpus(json_path=CORPUS_JSON):
+    """语料的分词结果，优先直接读取分词缓存。"""
+    from corpus_store import load_corpus
+    from preprocess import tokenize_corpus
+
+    corpus = load_token_cache()
+    _, bodies = load_corpus(json_path)
+    hashes = getattr(bodies, 'hashes', None)
+    if corpus is None or hashes is None or not np.array_equal(corpus.hashes, hashes):
+        corpus = tokenize_corpus(bodies, hashes=hashes)
+    return corpus
+
+
+def prepare_bow(corpus, dict_path=LDA_DICT_PATH):
+    """返回 (词袋签名, 内存映射的 CSR 词袋)，缓存失效时用 lda_k3.dict 重新构造。"""
+    from gensim.corpora import Dictionary
+
+    signature = bow_signature(corpus.hashes, dict_path)
+    bow = load_bow(signature)
+    if bow is not None:
+        print(f"--- 已从 {BOW_DIR} 内存映射载入词袋 ({bow.shape[0]} 篇, {bow.nnz} 个非零项) ---")
+        return signature, bow
+
+    token2id = Dictionary.load(dict_path).token2id
+    # 分词缓存的词 ID -> 词典 ID，词典外的词为 -1，整段词序列一次映射
+    remap = np.array([token2id.get(w, -1) for w in corpus.vocab], dtype=np.int64)
+    term_ids = remap[np.asarray(corpus.ids)]
+    rows = np.repeat(np.arange(len(corpus)), np.diff(corpus.offsets))
+    known = term_ids >= 0
+    bow = sparse.csr_matrix((np.ones(known.sum(), dtype=np.float32), (rows[known], term_ids[known])),
+                            shape=(len(corpus), len(token2id)))
+    bow.sum_duplicates()
+    bow.indices = bow.indices.astype(np.int32)
+    save_bow(bow, signature)
+    print(f"--- 已生成词袋缓存 {BOW_DIR} ({bow.shape[0]} 篇, {bow.nnz} 个非零项) ---")
+    return signature, load_bow(signature)
+
+
+# ========================= 2. 单个 K 的训练与评估（在工作进程中执行） =========================
+def model_path(k):
+    return os.path.join(MODEL_DIR, f'lda_k{k}.model')
+
+
+def train_and_score(k, signature, params, dict_path=LDA_DICT_PATH):
+    """训练主题数为 k 的模型并保存，返回该 K 的得分记录。"""
+    from gensim.corpora import Dictionary
+    from gensim.matutils import Sparse2Corpus
+    from gensim.models import CoherenceModel, LdaModel
+
+    start = time.perf_counter()
+    bow = load_bow(signature)
+    if bow is None:
+        raise RuntimeError(f"词袋缓存 {BOW_DIR} 已失效")
+    dictionary = Dictionary.load(dict_path)
+    corpus = Sparse2Corpus(bow, documents_columns=False)
+    model = LdaModel(corpus=corpus, id2word=dictionary, num_topics=k, **params)
+    perplexity = float(np.exp2(-model.log_perplexity(corpus)))
+    texts = load_token_cache().keywords()
+    # 每个 K 已独占一个工作进程，一致性计算不再另开进程
+    coherence = CoherenceModel(model=model, texts=texts, dictionary=dictionary, coherence='c_v',
+                               processes=1).get_coherence()
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    model.save(model_path(k))
+    return {'coherence': float(coherence), 'perplexity': perplexity, 'model': model_path(k),
+            'seconds': round(time.perf_counter() - start, 2)}
+
+
+# ========================= 3. 并行扫描与得分表 =========================
+def record_key(k, signature, params):
+    payload = json.dumps({'k': k, 'bow': signature, 'params': params}, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def load_scores(path=SCORES_PATH):
+    try:
+        return read_json(path)
+    except (OSError, ValueError):
+        return {}
+
+
+def sweep(k_values, workers=None, params=None, force=False):
+    """训练并评估各 K 值，返回 {K: 得分记录}；已有有效记录的 K 不再训练。"""
+    params = dict(LDA_PARAMS, **(params or {}))
+    signature, _ = prepare_bow(tokenized_corpus())
+    scores = load_scores()
+    results, pending = {}, []
+    for k in k_values:
+        key = record_key(k, signature, params)
+        record = scores.get(str(k))
+        if not force and record and record.get('key') == key and os.path.exists(record['model']):
+            print(f"--- K={k}: 语料与参数未变化，复用已有模型 ---")
+            results[k] = record
+        else:
+            pending.append((k, key))
+
+    workers = min(workers or default_workers(), len(pending)) or 1
+    context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {executor.submit(train_and_score, k, signature, params): (k, key) for k, key in pending}
+        for future in as_completed(futures):
+            k, key = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                print(f"!!! K={k} 训练失败: {e} !!!")
+                continue
+            record['key'] = key
+            scores[str(k)] = results[k] = record
+            # 每完成一个 K 就写回得分表，扫描中断时已训练的模型不会白费
+            write_json_atomic(SCORES_PATH, scores)
+            print(f"--- K={k}: C_v={record['coherence']:.4f}，耗时 {record['seconds']:.2f}s ---")
+    return dict(sorted(results.items()))
+
+
+def print_scores(results):
+    if not results:
+        return
+    best = max(results, key=lambda k: results[k]['coherence'])
+    print(f"{'K':>4}  {'C_v':>8}  {'困惑度':>10}  模型")
+    for k, record in results.items():
+        mark = '  <- 最佳' if k == best else ''
+        print(f"{k:>4}  {record['coherence']:>8.4f}  {record['perplexity']:>10.1f}  {record['model']}{mark}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='并行训练一组 K 值的 LDA 模型并按 C_v 一致性选择主题数')
+    parser.add_argument('k_range', nargs='*', type=int, metavar='K',
+                        help=f"K 的范围 K_MIN K_MAX（含两端），默认 {DEFAULT_K_RANGE[0]} {DEFAULT_K_RANGE[1]}")
+    parser.add_argument('--step', type=int, default=1, help='K 的步长')
+    parser.add_argument('--workers', type=int, default=None, help='并行进程数，默认使用全部 CPU 核心')
+    parser.add_argument('--passes', type=int, default=LDA_PARAMS['passes'], help='每个模型的训练轮数')
+    parser.add_argument('--force', action='store_true', help='忽略得分表，重新训练所选的全部 K')
+    args = parser.parse_args()
+    if args.k_range and len(args.k_range) != 2:
+        parser.error('K 的范围需要两个整数 K_MIN K_MAX')
+    k_min, k_max = args.k_range or DEFAULT_K_RANGE
+    if not 2 <= k_min <= k_max or args.step < 1:
+        parser.error('需要 2 <= K_MIN <= K_MAX 且步长至少为 1')
+
+    start = time.perf_counter()
+    results = sweep(range(k_min, k_max + 1, args.step), args.workers, {'passes': args.passes}, args.force)
+    print_scores(results)
+    print(f"--- 扫描结束，总耗时 {time.perf_counter() - start:.2f}s ---")
@@ -0,0 +1,39 @@
+# metrics.py - 回调耗时统计，供 /metrics 接口输出
+
+import time
+import threading
+import functools
+
+_callback_stats = {}
+_lock = threading.Lock()
+
+
+def timed_callback(func):
+    """记录回调函数的调用次数与耗时。放在 @app.callback 之下，使 Dash 注册的是计时后的函数。"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _lock:
+                stats = _callback_stats.setdefault(func.__name__, {'calls': 0, 'total': 0.0, 'max': 0.0})
+                stats['calls'] += 1
+                stats['total'] += elapsed
+                stats['max'] = max(stats['max'], elapsed)
+    return wrapper
+
+
+def callback_report():
+    """各回调的调用次数、累计/平均/最大耗时（毫秒）。"""
+    with _lock:
+        return {
+            name: {
+                'calls': stats['calls'],
+                'total_ms': round(stats['total'] * 1000, 3),
+                'mean_ms': round(stats['total'] * 1000 / stats['calls'], 3),
+                'max_ms': round(stats['max'] * 1000, 3),
+            }
+            for name, stats in _callback_stats.items()
+        }
@@ -0,0 +1,322 @@
+# news_store.py - 仪表盘的内存数据层：在加载时一次性建立查询所需的索引与聚合
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from cooccurrence import MIN_FREQUENCY, TOP_N, pair_counts, strongest_pairs, network_data
+from sentiment import sentiment_scores
+from synonyms import normalize_corpus
+
+ONE_DAY = pd.Timedelta(days=1)
+# 新闻表格直接展示的列，均在加载时预先生成
+TABLE_COLUMNS = ['time_str', 'title_link', 'topic_name', 'probability']
+
+# 表格筛选条件中的运算符 -> 对 Series 求布尔掩码
+FILTER_OPERATORS = {
+    'eq': lambda col, v: col == v,
+    'ne': lambda col, v: col != v,
+    'lt': lambda col, v: col < v,
+    'le': lambda col, v: col <= v,
+    'gt': lambda col, v: col > v,
+    'ge': lambda col, v: col >= v,
+}
+
+
+class NewsStore:
+    """封装新闻 DataFrame 及其预计算结构，回调函数只通过这里查询数据。"""
+
+    def __init__(self, df, topic_names, corpus, synonyms=None):
+        """synonyms 为 {同义词: 标准词} 时，词频、TF-IDF 与共现统计都按归并后的标准词计算。"""
+        self.topics = list(topic_names)
+        self.synonyms = synonyms
+        if synonyms:
+            corpus = normalize_corpus(corpus, synonyms)
+        vocab, tf = self._corpus_term_matrix(corpus)
+        df = df.assign(sentiment=self._article_sentiment(corpus))
+        self._build(df, vocab, tf, np.asarray(corpus.ids), np.asarray(corpus.offsets))
+
+    def _build(self, df, vocab, tf, token_ids, token_offsets, doc_freq=None):
+        self._build_time_index(df)
+        self._build_term_matrix(vocab, tf)
+        self._build_tfidf(np.bincount(tf.indices, minlength=tf.shape[1]) if doc_freq is None else doc_freq)
+        self._build_token_stream(token_ids, token_offsets)
+        self._build_topic_cube()
+
+    def extended(self, df_new, corpus_new):
+        """返回合并了新文章的新 NewsStore，自身保持不变，以便服务期间整体替换。
+
+        df_new 与 corpus_new 逐行对应；新词追加到现有词表之后，已有的词 ID 不变。
+        只为新文章分词结果编码、统计文档频率和生成表格展示列，已有文章的这些结果直接沿用。
+        其余索引仍按合并后的全部新闻重建：按时间重排、主题分区的拷贝、词频矩阵、TF-IDF 归一化系数
+        （文档总数变化后所有词的 IDF 都会变化）与计数立方体，都是对全部行的向量化操作，耗时与语料规模成正比
+        （1000 篇时约十几毫秒）。增量导入每个轮询周期最多调用一次，同一周期内到达的新闻合并为一批。
+        """
+        if self.synonyms:
+            corpus_new = normalize_corpus(corpus_new, self.synonyms)
+        word_to_id = self._word_ids().copy()
+        remap = np.array([word_to_id.setdefault(w, len(word_to_id)) for w in corpus_new.vocab], dtype=np.int32)
+        new_words = list(word_to_id)[len(self.vocab):] if len(word_to_id) > len(self.vocab) else []
+        vocab = np.concatenate([self.vocab, np.array(new_words, dtype=object)])
+        _, tf_new = self._corpus_term_matrix(corpus_new)
+        tf_new = sparse.csr_matrix((tf_new.data, remap[tf_new.indices], tf_new.indptr),
+                                   shape=(tf_new.shape[0], len(vocab)))
+        tf_old = self.term_matrices[None]
+        tf_old = sparse.csr_matrix((tf_old.data, tf_old.indices, tf_old.indptr), shape=(tf_old.shape[0], len(vocab)))
+        # 与 df、词频矩阵一致：已有新闻（已按时间排序）在前，新文章在后
+        token_ids = np.concatenate([self.token_ids, remap[np.asarray(corpus_new.ids)]])
+        token_offsets = np.concatenate([self.token_offsets[:-1], np.asarray(corpus_new.offsets) + self.token_offsets[-1]])
+
+        df_new = self._display_columns(df_new.assign(sentiment=self._article_sentiment(corpus_new)))
+        columns = list(self.df.columns)
+        df = pd.concat([self.df[columns], df_new[columns]], ignore_index=True)
+        merged = NewsStore.__new__(NewsStore)
+        merged.topics = self.topics
+        merged.synonyms = self.synonyms
+        merged._word_to_id = word_to_id
+        doc_freq = np.zeros(len(vocab), dtype=np.int64)
+        doc_freq[:len(self.doc_freq)] = self.doc_freq
+        doc_freq += np.bincount(tf_new.indices, minlength=len(vocab))
+        merged._build(df, vocab, sparse.vstack([tf_old, tf_new], format='csr'), token_ids, token_offsets, doc_freq)
+        return merged
+
+    def _word_ids(self):
+        """词 -> 词 ID 的字典，第一次增量导入时建立，之后随合并的新词表一起传给新的 NewsStore。"""
+        word_to_id = getattr(self, '_word_to_id', None)
+        if word_to_id is None:
+            word_to_id = self._word_to_id = {w: i for i, w in enumerate(self.vocab.tolist())}
+        return word_to_id
+
+    # ---------- 按时间排序、按主题分区的行索引 ----------
+    def _build_time_index(self, df):
+        """按时间排序全部新闻，并为每个主题保留一份同样有序的分区。"""
+        # order[i] 为排序后第 i 行在原始数据（及分词语料）中的位置
+        self.order = np.argsort(df['time'].to_numpy(), kind='stable')
+        # 增量合并时已有行的展示列已经生成，只有首次加载才需要整列生成
+        if 'time_str' not in df.columns:
+            df = self._display_columns(df)
+        self.df = df.iloc[self.order].reset_index(drop=True)
+        self.partition_rows = {None: np.arange(len(self.df))}
+        for topic in self.topics:
+            self.partition_rows[topic] = np.flatnonzero((self.df['topic_name'] == topic).to_numpy())
+        self.partitions = {key: self.df.iloc[rows].reset_index(drop=True) for key, rows in self.partition_rows.items()}
+        self.partition_times = {key: part['time'].to_numpy() for key, part in self.partitions.items()}
+
+    @staticmethod
+    def _display_columns(df):
+        """生成表格直接展示的时间字符串与 Markdown 标题链接列。"""
+        return df.assign(time_str=df['time'].dt.strftime('%Y-%m-%d %H:%M'),
+                         title_link='[' + df['title'].astype(str) + '](' + df['url'].astype(str) + ')')
+
+    @staticmethod
+    def window_bounds(start_date, end_date):
+        """把日期窗口换算成半开区间 [start, end)，结束日整天计入。"""
+        start = pd.Timestamp(start_date).normalize()
+        end = pd.Timestamp(end_date).normalize() + ONE_DAY
+        return start.to_datetime64(), end.to_datetime64()
+
+    def slice_bounds(self, start_date, end_date, topic=None):
+        """窗口在主题分区中对应的行区间 [lo, hi)，两次二分查找即可定位，不构造布尔掩码。"""
+        if topic not in self.partitions:
+            return 0, 0
+        start, end = self.window_bounds(start_date, end_date)
+        times = self.partition_times[topic]
+        return times.searchsorted(start, side='left'), times.searchsorted(end, side='left')
+
+    def select(self, start_date, end_date, topic=None):
+        """返回窗口内（可限定主题）按时间升序的新闻切片。"""
+        lo, hi = self.slice_bounds(start_date, end_date, topic)
+        part = self.partitions.get(topic, self.df)
+        return part.iloc[lo:hi]
+
+    # ---------- 新闻表格的服务端筛选、排序与分页 ----------
+    @staticmethod
+    def _filter_mask(rows, column, operator, value):
+        col = rows[column]
+        is_time = pd.api.types.is_datetime64_any_dtype(col)
+        if operator == 'contains':
+            col = rows['time_str'] if is_time else col
+            return col.astype(str).str.contains(str(value), regex=False)
+        if operator == 'datestartswith':
+            return rows['time_str'].str.startswith(str(value))
+        if is_time:
+            value = pd.Timestamp(str(value))
+        return FILTER_OPERATORS[operator](col, value)
+
+    def query_table(self, start_date, end_date, topic=None, filters=(), sort_by=(), page=0, page_size=10):
+        """返回 (当前页的新闻行, 满足条件的总行数)。
+
+        filters 为 (列名, 运算符, 值) 列表，sort_by 为 (列名, 是否升序) 列表；未指定排序时按时间倒序。
+        """
+        rows = self.select(start_date, end_date, topic)
+        for column, operator, value in filters:
+            rows = rows[self._filter_mask(rows, column, operator, value)]
+        if sort_by:
+            columns, ascending = zip(*sort_by)
+            rows = rows.sort_values(list(columns), ascending=list(ascending), kind='stable')
+        else:
+            rows = rows.iloc[::-1]
+        start = page * page_size
+        return rows.iloc[start:start + page_size], len(rows)
+
+    # ---------- 每篇新闻的词频向量与情感得分 ----------
+    @staticmethod
+    def _article_sentiment(corpus):
+        """分词时已统计的正/负面词数 -> 每篇新闻的情感得分，语料未带情感计数时记为 0。"""
+        if corpus.sentiment is None:
+            return np.zeros(len(corpus))
+        return sentiment_scores(corpus.sentiment)
+
+    @staticmethod
+    def _corpus_term_matrix(corpus):
+        """由整数编码的分词结果构造 (新闻 × 词) 稀疏词频矩阵，行顺序与分词语料一致。"""
+        n_docs, n_terms = len(corpus), len(corpus.vocab)
+        # 必须复制：csr_matrix 会直接引用 int32 的 ids，sum_duplicates 原地排序合并后会改写语料本身
+        ids = np.array(corpus.ids)
+        tf = sparse.csr_matrix((np.ones(len(ids), dtype=np.int32), ids, np.asarray(corpus.offsets)),
+                               shape=(n_docs, n_terms))
+        tf.sum_duplicates()
+        return list(corpus.vocab), tf
+
+    def _build_term_matrix(self, vocab, tf):
+        """按时间排序后的行顺序重排词频矩阵，并为每个主题分区各保留一份。"""
+        self.vocab = np.array(vocab, dtype=object)
+        tf = tf[self.order]
+        self.term_matrices = {key: tf[rows] for key, rows in self.partition_rows.items()}
+
+    @staticmethod
+    def _row_range_sum(matrix, lo, hi, row_weights=None):
+        """对 CSR 矩阵连续的行 [lo, hi) 按列求和（可按行加权），只访问这些行的非零元素。"""
+        start, end = matrix.indptr[lo], matrix.indptr[hi]
+        data = matrix.data[start:end]
+        if row_weights is not None:
+            data = data * np.repeat(row_weights[lo:hi], np.diff(matrix.indptr[lo:hi + 1]))
+        return np.bincount(matrix.indices[start:end], weights=data, minlength=matrix.shape[1])
+
+    def top_terms(self, start_date, end_date, topic=None, k=100):
+        """窗口内词频最高的 k 个词，对连续的矩阵行直接求和，无需拼接或重新分词。"""
+        lo, hi = self.slice_bounds(start_date, end_date, topic)
+        if hi <= lo:
+            return {}
+        counts = self._row_range_sum(self.term_matrices[topic], lo, hi)
+        k = min(k, np.count_nonzero(counts))
+        if k == 0:
+            return {}
+        top = np.argpartition(counts, -k)[-k:]
+        top = top[np.argsort(-counts[top], kind='stable')]
+        return dict(zip(self.vocab[top].tolist(), counts[top].astype(int).tolist()))
+
+    # ---------- TF-IDF ----------
+    def _build_tfidf(self, doc_freq):
+        """由文档频率得到平滑 IDF，并预先算出每篇新闻 TF-IDF 向量的 L2 归一化系数。"""
+        self.doc_freq = doc_freq
+        n_docs = len(self.df)
+        self.idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+        tf = self.term_matrices[None]
+        norms = np.sqrt(tf.multiply(tf) @ (self.idf ** 2))
+        weights = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        self.tfidf_row_weights = {key: weights[rows] for key, rows in self.partition_rows.items()}
+
+    def top_tfidf(self, start_date, end_date, topic=None, k=20):
+        """窗口内 TF-IDF 最高的 k 个词，格式同 plot_data.json 中的 tfidf_bar_data。
+
+        每篇新闻的 TF-IDF 向量归一化后按行求和：先对词频按行加权求和，最后整体乘以 IDF。
+        """
+        lo, hi = self.slice_bounds(start_date, end_date, topic)
+        if hi <= lo:
+            return []
+        tf = self.term_matrices[topic]
+        scores = self._row_range_sum(tf, lo, hi, self.tfidf_row_weights[topic]) * self.idf
+        k = min(k, np.count_nonzero(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        freq = self._row_range_sum(tf, lo, hi)
+        return [{'word': self.vocab[i], 'freq': int(freq[i]), 'tfidf': float(scores[i])} for i in top]
+
+    # ---------- 词语共现网络 ----------
+    @staticmethod
+    def _gather_docs(ids, offsets, rows):
+        """按 rows 的顺序取出各篇新闻的词序列，返回拼接后的 (ids, offsets)。"""
+        starts, lengths = offsets[rows], offsets[rows + 1] - offsets[rows]
+        new_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(offsets.dtype)
+        index = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+        return ids[index], new_offsets
+
+    def _build_token_stream(self, token_ids, token_offsets):
+        """按时间排序后的行顺序重排整数编码的词序列，共现统计时按窗口直接切片。
+
+        不预先统计 (新闻 × 词对) 矩阵：它的非零元素约为词数的 3 倍，随语料线性增长，启动与每次增量导入都要重建。
+        """
+        self.token_ids, self.token_offsets = self._gather_docs(token_ids, token_offsets, self.order)
+
+    def _window_tokens(self, topic, lo, hi):
+        """主题分区中行区间 [lo, hi) 的词序列：全部主题时为连续切片，单个主题时按行收集。"""
+        offsets = self.token_offsets
+        if topic is None:
+            return self.token_ids[offsets[lo]:offsets[hi]], offsets[lo:hi + 1] - offsets[lo]
+        return self._gather_docs(self.token_ids, offsets, self.partition_rows[topic][lo:hi])
+
+    def cooccurrence_network(self, start_date, end_date, topic=None, min_frequency=MIN_FREQUENCY, top_n=TOP_N):
+        """窗口内（可限定主题）共现最强的 top_n 个词对，返回 {'nodes': [...], 'edges': [...]}。
+
+        词频由词频矩阵按行区间求和；共现次数只对窗口内的词序列统计，且只统计两端词频都不低于 min_frequency 的词对。
+        """
+        lo, hi = self.slice_bounds(start_date, end_date, topic)
+        if hi <= lo:
+            return {'nodes': [], 'edges': []}
+        freq = self._row_range_sum(self.term_matrices[topic], lo, hi).astype(np.int64)
+        ids, offsets = self._window_tokens(topic, lo, hi)
+        codes, counts = pair_counts(ids, offsets, keep=freq[ids] >= min_frequency)
+        edges = strongest_pairs(codes, counts, freq, min_frequency, top_n)
+        return network_data(edges, self.vocab, freq)
+
+    # ---------- 日期 × 主题 计数立方体 ----------
+    def _build_topic_cube(self):
+        """按 (日期, 主题) 预先统计新闻数量与情感得分之和，并沿日期轴对数量求前缀和。"""
+        days = self.df['time'].dt.normalize()
+        self.first_day = days.min()
+        self.last_day = days.max()
+        self.days = pd.date_range(self.first_day, self.last_day, freq='D')
+
+        day_idx = ((days - self.first_day) // ONE_DAY).to_numpy(dtype=np.int64)
+        topic_idx = pd.Categorical(self.df['topic_name'], categories=self.topics).codes.astype(np.int64)
+        valid = topic_idx >= 0
+        flat = day_idx[valid] * len(self.topics) + topic_idx[valid]
+        counts = np.bincount(flat, minlength=len(self.days) * len(self.topics))
+        self.topic_cube = counts.reshape(len(self.days), len(self.topics))
+        scores = self.df['sentiment'].to_numpy(dtype=np.float64)[valid]
+        self.sentiment_cube = np.bincount(flat, weights=scores,
+                                          minlength=len(self.days) * len(self.topics)).reshape(self.topic_cube.shape)
+        # topic_prefix[i] 为前 i 天各主题的累计数量，任意窗口的合计只需两行相减
+        self.topic_prefix = np.vstack([np.zeros((1, len(self.topics)), dtype=counts.dtype),
+                                       np.cumsum(self.topic_cube, axis=0)])
+
+    def day_range(self, start_date, end_date):
+        """把 [start_date, end_date]（按整天计，含结束日）换算成立方体的行区间 [lo, hi)。"""
+        start = (pd.Timestamp(start_date).normalize() - self.first_day) // ONE_DAY
+        end = (pd.Timestamp(end_date).normalize() - self.first_day) // ONE_DAY + 1
+        lo = min(max(start, 0), len(self.days))
+        hi = min(max(end, lo), len(self.days))
+        return lo, hi
+
+    def topic_counts_by_day(self, start_date, end_date):
+        """返回窗口内的日期序列及对应的 (天数 × 主题数) 计数矩阵，不扫描任何新闻行。"""
+        lo, hi = self.day_range(start_date, end_date)
+        return self.days[lo:hi], self.topic_cube[lo:hi]
+
+    def topic_totals(self, start_date, end_date):
+        """窗口内各主题的新闻总数，利用前缀和 O(1) 求得。"""
+        lo, hi = self.day_range(start_date, end_date)
+        return dict(zip(self.topics, (self.topic_prefix[hi] - self.topic_prefix[lo]).tolist()))
+
+    def sentiment_by_day(self, start_date, end_date):
+        """窗口内逐日的平均情感得分，返回 (日期序列, 天数×主题数 的矩阵, 全部主题的序列)。
+
+        当天没有新闻时为 NaN；与计数立方体一样只做切片和除法，不扫描新闻行。
+        """
+        lo, hi = self.day_range(start_date, end_date)
+        counts, sums = self.topic_cube[lo:hi], self.sentiment_cube[lo:hi]
+        mean = lambda s, c: np.divide(s, c, out=np.full(np.shape(s), np.nan), where=c > 0)
+        return self.days[lo:hi], mean(sums, counts), mean(sums.sum(axis=1), counts.sum(axis=1))
@@ -0,0 +1,237 @@
+# preprocess.py - 新闻文本预处理：分词、停用词过滤与分词结果磁盘缓存
+
+import os
+import json
+import hashlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import jieba
+
+from sentiment import get_lexicon, lexicon_signature, score_tokens
+
+# ========================= 0. 分词与停用词 =========================
+STOP_WORDS = {'我们', '的', '了', '是', '在', '也', '等', '该', '将', '为', '以', '对', '和', '中', '月', '日', '年'}
+# 关键词过滤规则有改动时递增此版本号，使旧缓存整体失效
+KEYWORD_RULE_VERSION = 1
+
+jieba.setLogLevel('WARN')
+
+def _filter_keywords(words):
+    return [word for word in words if word not in STOP_WORDS and len(word) > 1 and not word.isnumeric()]
+
+def get_keywords(text):
+    if not isinstance(text, str): return []
+    return _filter_keywords(jieba.lcut(text))
+
+def analyze_text(text):
+    """一次分词同时得到关键词与情感计数 (正面词数, 负面词数)；否定词多为单字，须在过滤前计数。"""
+    if not isinstance(text, str): return [], (0, 0)
+    words = jieba.lcut(text)
+    return _filter_keywords(words), score_tokens(words)
+
+# ========================= 1. 多进程分词 =========================
+# 并行进程数可通过环境变量 NEWS_SEG_WORKERS 配置，默认使用全部 CPU 核心
+SEG_CHUNK_SIZE = 32
+
+def default_workers():
+    workers = os.environ.get('NEWS_SEG_WORKERS')
+    if workers:
+        return max(1, int(workers))
+    return os.cpu_count() or 1
+
+def _init_segment_worker():
+    """每个工作进程启动时只加载一次 jieba 词典与情感词典。"""
+    jieba.setLogLevel('WARN')
+    jieba.initialize()
+    get_lexicon()
+
+def _segment_chunk(texts):
+    return [analyze_text(t) for t in texts]
+
+def _split_results(results):
+    sentiment = np.array([counts for _, counts in results], dtype=np.int32).reshape(-1, 2)
+    return [keywords for keywords, _ in results], sentiment
+
+def segment_texts(texts, workers=None, chunk_size=SEG_CHUNK_SIZE):
+    """按块分发到进程池并行分词，返回 (关键词列表, 文章数×2 的情感计数)，顺序与输入一致。"""
+    texts = list(texts)
+    workers = default_workers() if workers is None else max(1, workers)
+    workers = min(workers, -(-len(texts) // chunk_size)) if texts else 1
+    # 依赖 fork 启动方式：spawn 会在子进程中重新执行仪表盘脚本的顶层加载逻辑
+    if workers <= 1 or 'fork' not in mp.get_all_start_methods():
+        return _split_results(_segment_chunk(texts))
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('fork'),
+                             initializer=_init_segment_worker) as executor:
+        return _split_results([result for chunk in executor.map(_segment_chunk, chunks) for result in chunk])
+
+# ========================= 2. 分词缓存 =========================
+# 缓存采用列式布局，每列一个 .npy 文件，可直接内存映射：
+#   hashes.npy  - 每篇文章内容的 SHA1 摘要 (uint8, 形状 n×20)
+#   offsets.npy - 每篇文章在 ids.npy 中的起止偏移 (int64, 长度 n+1)
+#   ids.npy     - 所有文章拼接后的词 ID 序列 (int32)
+#   vocab.json  - 词 ID -> 词语
+#   sentiment.npy - 每篇文章的 (正面词数, 负面词数)，由 sentiment.score_tokens 在分词时顺带算出 (int32, n×2)
+#   meta.json   - 缓存签名与各列长度，最后写入，用于校验缓存完整性
+TOKEN_CACHE_DIR = os.path.join('cache', 'tokens')
+
+def content_hash(text):
+    """计算文章内容的 SHA1 摘要，非字符串内容按空串处理。"""
+    if not isinstance(text, str):
+        text = ''
+    return hashlib.sha1(text.encode('utf-8')).digest()
+
+def cache_signature():
+    """由停用词表、过滤规则版本、情感词典和 jieba 词典版本组成的缓存签名。"""
+    h = hashlib.sha1()
+    h.update('\n'.join(sorted(STOP_WORDS)).encode('utf-8'))
+    h.update(f"rule={KEYWORD_RULE_VERSION};sentiment={lexicon_signature()};jieba={jieba.__version__}".encode('utf-8'))
+    dict_path = jieba.dt.dictionary
+    if dict_path:
+        stat = os.stat(dict_path)
+        h.update(f"dict={os.path.abspath(dict_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+    else:
+        h.update(f"dict=default:{jieba.DEFAULT_DICT_NAME}".encode('utf-8'))
+    return h.hexdigest()
+
+
+class TokenizedCorpus:
+    """整数编码后的语料：vocab[ids[offsets[i]:offsets[i+1]]] 即第 i 篇文章的关键词。
+
+    sentiment[i] 为第 i 篇文章的 (正面词数, 负面词数)，未统计时为 None。
+    """
+
+    def __init__(self, vocab, offsets, ids, hashes, sentiment=None):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.ids = ids
+        self.hashes = hashes
+        self.sentiment = sentiment
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def doc_ids(self, i):
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def keywords(self):
+        """还原为每篇文章的关键词列表，与 get_keywords 的输出一致。"""
+        vocab = np.array(self.vocab, dtype=object)
+        return [vocab[self.doc_ids(i)].tolist() for i in range(len(self))]
+
+
+def encode_keywords(keyword_lists, sentiment=None):
+    """把关键词列表编码为独立词表的 TokenizedCorpus（不读写缓存，用于增量新增的少量文章）。"""
+    word_to_id = {}
+    docs = [np.fromiter((word_to_id.setdefault(w, len(word_to_id)) for w in words), dtype=np.int32)
+            for words in keyword_lists]
+    offsets = np.zeros(len(docs) + 1, dtype=np.int64)
+    np.cumsum([len(d) for d in docs], out=offsets[1:])
+    ids = np.concatenate(docs) if docs else np.zeros(0, dtype=np.int32)
+    return TokenizedCorpus(list(word_to_id), offsets, ids, None, sentiment)
+
+
+def load_token_cache(cache_dir=TOKEN_CACHE_DIR):
+    """读取分词缓存；缓存不存在、签名不符或文件不完整时返回 None。"""
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('signature') != cache_signature():
+            return None
+        with open(os.path.join(cache_dir, 'vocab.json'), 'r', encoding='utf-8') as f:
+            vocab = json.load(f)
+        hashes = np.load(os.path.join(cache_dir, 'hashes.npy'), mmap_mode='r')
+        offsets = np.load(os.path.join(cache_dir, 'offsets.npy'), mmap_mode='r')
+        ids = np.load(os.path.join(cache_dir, 'ids.npy'), mmap_mode='r')
+        sentiment = np.load(os.path.join(cache_dir, 'sentiment.npy'), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if (len(vocab) != meta['n_vocab'] or len(hashes) != meta['n_docs'] or len(sentiment) != meta['n_docs']
+            or len(offsets) != meta['n_docs'] + 1 or len(ids) != meta['n_tokens']):
+        return None
+    return TokenizedCorpus(vocab, offsets, ids, hashes, sentiment)
+
+
+def _atomic_save_npy(path, array):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def save_token_cache(corpus, cache_dir=TOKEN_CACHE_DIR):
+    """写入分词缓存。meta.json 最后写入，中途中断时下次读取会因校验失败而重建。"""
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    vocab_tmp = os.path.join(cache_dir, f"vocab.json.tmp-{os.getpid()}")
+    with open(vocab_tmp, 'w', encoding='utf-8') as f:
+        json.dump(corpus.vocab, f, ensure_ascii=False)
+    os.replace(vocab_tmp, os.path.join(cache_dir, 'vocab.json'))
+    _atomic_save_npy(os.path.join(cache_dir, 'hashes.npy'), np.asarray(corpus.hashes, dtype=np.uint8).reshape(-1, 20))
+    _atomic_save_npy(os.path.join(cache_dir, 'offsets.npy'), np.asarray(corpus.offsets, dtype=np.int64))
+    _atomic_save_npy(os.path.join(cache_dir, 'ids.npy'), np.asarray(corpus.ids, dtype=np.int32))
+    _atomic_save_npy(os.path.join(cache_dir, 'sentiment.npy'), np.asarray(corpus.sentiment, dtype=np.int32).reshape(-1, 2))
+    meta = {
+        'signature': cache_signature(),
+        'n_docs': len(corpus),
+        'n_tokens': int(len(corpus.ids)),
+        'n_vocab': len(corpus.vocab),
+    }
+    meta_tmp = f"{meta_path}.tmp-{os.getpid()}"
+    with open(meta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(meta_tmp, meta_path)
+
+
+def tokenize_corpus(texts, cache_dir=TOKEN_CACHE_DIR, workers=None, hashes=None):
+    """对整个语料分词，只对缓存中不存在（新增或内容已修改）的文章重新调用 jieba。
+
+    texts 只需支持 len() 与下标访问；同时给出预先算好的 hashes 时，只会读取需要重新分词的正文。
+    """
+    if hashes is None:
+        texts = list(texts)
+        hashes = [content_hash(t) for t in texts]
+    else:
+        hashes = [h.tobytes() for h in np.asarray(hashes, dtype=np.uint8).reshape(-1, 20)]
+    cached = load_token_cache(cache_dir)
+
+    cached_rows = {}
+    if cached is not None:
+        cached_rows = {h.tobytes(): i for i, h in enumerate(cached.hashes)}
+    missing = [i for i, h in enumerate(hashes) if h not in cached_rows]
+    print(f"--- 分词缓存命中 {len(hashes) - len(missing)} 篇，需重新分词 {len(missing)} 篇 ---")
+    fresh_keywords, fresh_sentiment = segment_texts([texts[i] for i in missing], workers)
+    fresh = dict(zip(missing, fresh_keywords))
+
+    vocab = list(cached.vocab) if cached is not None else []
+    word_to_id = {w: i for i, w in enumerate(vocab)}
+    offsets = np.zeros(len(hashes) + 1, dtype=np.int64)
+    sentiment = np.zeros((len(hashes), 2), dtype=np.int32)
+    sentiment[missing] = fresh_sentiment
+    chunks = []
+    for i, h in enumerate(hashes):
+        if i in fresh:
+            doc = np.fromiter((word_to_id.setdefault(w, len(word_to_id)) for w in fresh[i]), dtype=np.int32)
+        else:
+            doc = cached.doc_ids(cached_rows[h])
+            sentiment[i] = cached.sentiment[cached_rows[h]]
+        chunks.append(doc)
+        offsets[i + 1] = offsets[i] + len(doc)
+    if len(word_to_id) > len(vocab):
+        vocab = [None] * len(word_to_id)
+        for w, i in word_to_id.items():
+            vocab[i] = w
+    ids = np.concatenate(chunks).astype(np.int32) if chunks else np.zeros(0, dtype=np.int32)
+
+    hash_array = np.frombuffer(b''.join(hashes), dtype=np.uint8).reshape(-1, 20)
+    corpus = TokenizedCorpus(vocab, offsets, ids, hash_array, sentiment)
+    stale = bool(missing) or cached is None or len(cached) != len(corpus)
+    # 释放对旧缓存文件的内存映射后再覆盖写入（Windows 下被映射的文件无法替换）
+    del chunks, cached
+    if stale:
+        save_token_cache(corpus, cache_dir)
+    return corpus
@@ -2,7 +2,6 @@
 
 import pandas as pd
 import json
-import jieba
 import io
 import base64
 from wordcloud import WordCloud
@@ -18,6 +17,8 @@ from dash import dcc, html, dash_table
 from dash.dependencies import Input, Output, State
 import plotly.express as px
 
+from preprocess import tokenize_corpus
+
 # ========================= 0. 自动查找系统字体函数 =========================
 
 def get_system_font():
@@ -67,15 +68,8 @@ df['topic_id'] = df['topic_id'].astype(int)
 df['topic_name'] = df['topic_id'].map(TOPIC_MAP)
 df['time'] = pd.to_datetime(df['time'])
 
-stop_words = {'我们', '的', '了', '是', '在', '也', '等', '该', '将', '为', '以', '对', '和', '中', '月', '日', '年'}
-jieba.setLogLevel('WARN')
-def get_keywords(text):
-    if not isinstance(text, str): return []
-    words = jieba.lcut(text)
-    return [word for word in words if word not in stop_words and len(word) > 1 and not word.isnumeric()]
-
 print("--- 正在对所有新闻内容进行预分词... ---")
-df['keywords'] = df['content'].apply(get_keywords)
+df['keywords'] = tokenize_corpus(df['content']).keywords()
 print("--- 数据准备完成！即将启动Web服务... ---")
 
 # ========================= 2. 定义Dash应用布局 =========================
@@ -0,0 +1,88 @@
+# sentiment.py - 基于 NTUSD 情感词典与否定词表的新闻情感计数
+#
+# 正/负面词典与否定词表编译为同一张 词 -> 类别 的哈希表，分词结果只需顺序扫描一遍：
+# 情感词前 NEGATION_WINDOW 个词以内（且不跨越分句标点）出现奇数个否定词时极性取反。
+# 统计在分词时顺带完成并随分词缓存保存，见 preprocess.analyze_text。
+
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+
+POSITIVE_PATH = 'ntusd-positive.txt'
+NEGATIVE_PATH = 'ntusd-negative.txt'
+NEGATION_PATH = 'not_words.txt'
+NEGATION_WINDOW = 3
+# 计分规则有改动时递增此版本号，使分词缓存中的情感计数整体失效
+SENTIMENT_RULE_VERSION = 1
+
+POSITIVE, NEGATIVE, NEGATOR, CLAUSE_BREAK = 1, -1, 2, 0
+CLAUSE_MARKS = '，。！？；：,.!?;:\n'
+
+
+def read_word_list(path):
+    """读取每行一个词的词表；NTUSD 为带 BOM 的 UTF-8，否定词表为 GBK 编码。"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    try:
+        text = raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        text = raw.decode('gbk')
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def _normalize(word):
+    # NTUSD 中大量 "xx的" 词条，而 jieba 总会把 "的" 单独切出
+    return word[:-1] if len(word) > 2 and word.endswith('的') else word
+
+
+@lru_cache(maxsize=None)
+def get_lexicon(positive_path=POSITIVE_PATH, negative_path=NEGATIVE_PATH, negation_path=NEGATION_PATH):
+    """编译后的 {词: 类别} 查找表，每个进程只构造一次。
+
+    同时出现在正、负面词典中的词视为歧义词不计分；否定词优先于情感词（如 "毫无"、"拒绝"）。
+    """
+    positive = {_normalize(w) for w in read_word_list(positive_path)}
+    negative = {_normalize(w) for w in read_word_list(negative_path)}
+    lexicon = {w: POSITIVE for w in positive - negative}
+    lexicon.update((w, NEGATIVE) for w in negative - positive)
+    lexicon.update((w, NEGATOR) for w in read_word_list(negation_path))
+    lexicon.update((mark, CLAUSE_BREAK) for mark in CLAUSE_MARKS)
+    return lexicon
+
+
+def lexicon_signature():
+    """词典内容与计分规则的摘要，作为分词缓存签名的一部分。"""
+    h = hashlib.sha1(f"sentiment={SENTIMENT_RULE_VERSION};window={NEGATION_WINDOW}".encode('utf-8'))
+    for word, category in sorted(get_lexicon().items()):
+        h.update(f"{word}\t{category}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+def score_tokens(words, window=NEGATION_WINDOW):
+    """一次扫描完整的分词结果，返回 (正面词数, 负面词数)，已按否定窗口调整极性。"""
+    lexicon = get_lexicon()
+    positive = negative = 0
+    negators = []
+    for i, word in enumerate(words):
+        category = lexicon.get(word)
+        if category is None:
+            continue
+        if category == CLAUSE_BREAK:
+            negators.clear()
+        elif category == NEGATOR:
+            negators.append(i)
+        else:
+            flips = sum(1 for j in negators if i - j <= window)
+            if (category == POSITIVE) != (flips % 2 == 1):
+                positive += 1
+            else:
+                negative += 1
+    return positive, negative
+
+
+def sentiment_scores(counts):
+    """(文章数 × 2) 的正/负面计数 -> 每篇文章的情感得分 (正-负)/(正+负)，没有情感词时为 0。"""
+    counts = np.asarray(counts, dtype=np.float64).reshape(-1, 2)
+    total = counts.sum(axis=1)
+    return np.divide(counts[:, 0] - counts[:, 1], total, out=np.zeros(len(counts)), where=total > 0)
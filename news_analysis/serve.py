@@ -0,0 +1,216 @@
+# serve.py - 生产环境入口：主进程一次性加载语料与索引，再 fork 出多个工作进程共同监听同一端口
+# 用法: python serve.py [--host 0.0.0.0] [--port 8050] [--workers N] [--threads T]
+#
+# 分词缓存、列式语料与 NewsStore 的索引都在主进程中建好，fork 之后由各工作进程以写时复制方式共享，
+# 工作进程无需重新加载 jieba、读取语料或构建 DataFrame；默认日期范围的词云也在 fork 之前渲染好。
+# 每个工作进程内再用多线程处理请求，同时处理的请求数不超过 --threads。主进程不处理请求，负责监督与增量导入：
+# 工作进程意外退出时自动补上；主进程按轮询周期检查 incoming/news.jsonl，并入新新闻并预渲染默认词云后，
+# 逐个 fork 带新数据的工作进程替换旧进程，旧进程停止接受新连接、处理完进行中的请求后退出。
+# 导入只做一次，所有工作进程始终以写时复制共享同一份数据；替换期间新旧进程会短暂地给出不同的数据。
+
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import logging
+import argparse
+import threading
+
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+
+DEFAULT_HOST = '0.0.0.0'
+DEFAULT_PORT = 8050
+DEFAULT_THREADS = 8
+LISTEN_BACKLOG = 128
+# 旧工作进程退出前等待进行中请求的最长时间（秒）
+WORKER_GRACE_SECONDS = 30
+# 主进程检查工作进程状态的间隔（秒）
+MASTER_TICK = 0.5
+
+
+def default_workers():
+    workers = os.environ.get('NEWS_SERVER_WORKERS')
+    if workers:
+        return max(1, int(workers))
+    return os.cpu_count() or 1
+
+
+class ConcurrencyLimit:
+    """WSGI 中间件：同时最多处理 threads 个请求，其余请求在此排队等待；wait_idle 等待进行中的请求全部完成。
+
+    Werkzeug 的多线程服务器为每个连接新开一个线程，不设上限；这里限制的是正在执行的请求而不是连接，
+    浏览器保持的空闲长连接不占用名额。请求从进入到响应体发送完毕（服务器关闭响应迭代器）都算作进行中。
+    """
+
+    def __init__(self, app, threads):
+        self.app = app
+        self._slots = threading.BoundedSemaphore(threads)
+        self._active = 0
+        self._idle = threading.Condition()
+        self._draining = False
+
+    def __call__(self, environ, start_response):
+        with self._idle:
+            self._active += 1
+        if self._draining:
+            start_response = self._closing(start_response)
+        try:
+            with self._slots:
+                response = self.app(environ, start_response)
+        except BaseException:
+            self._finished()
+            raise
+        return ClosingIterator(response, self._finished)
+
+    def _finished(self):
+        with self._idle:
+            self._active -= 1
+            self._idle.notify_all()
+
+    @staticmethod
+    def _closing(start_response):
+        def wrapped(status, headers, exc_info=None):
+            return start_response(status, list(headers) + [('Connection', 'close')], exc_info)
+        return wrapped
+
+    def drain(self):
+        """准备退出：之后的响应都带 Connection: close，客户端在长连接上的下一个请求改由其他工作进程处理。"""
+        self._draining = True
+
+    def wait_idle(self, timeout=None):
+        with self._idle:
+            return self._idle.wait_for(lambda: self._active == 0, timeout)
+
+
+def serve_worker(sock, dashboard, threads):
+    """工作进程：在继承来的监听套接字上处理请求。收到 SIGTERM 后停止接受新连接，等进行中的请求完成再退出。"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    app = ConcurrencyLimit(dashboard.app.server, threads)
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+
+    def terminate(*_):
+        app.drain()
+        # shutdown 会等待 serve_forever 退出，不能在运行 serve_forever 的主线程（信号处理函数）中直接调用
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, terminate)
+    server.serve_forever()
+    if not app.wait_idle(WORKER_GRACE_SECONDS):
+        print(f"!!! 工作进程 {os.getpid()} 等待进行中的请求超时，强制退出 !!!", flush=True)
+
+
+def run_master(sock, dashboard, workers, threads):
+    """主进程：fork 出工作进程并监督，按轮询周期增量导入；收到 SIGINT/SIGTERM 时结束全部工作进程。"""
+    children = set()
+    stopping = False
+    ingestor = dashboard.ingestor
+    # 并入新新闻后等默认词云预渲染完再 fork，主进程 fork 时没有其他线程在运行
+    ingestor.on_update = lambda new_store: dashboard.replace_store(new_store).join()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve_worker(sock, dashboard, threads)
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def terminate(pid):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            terminate(pid)
+
+    def reap():
+        """回收已退出的工作进程，非正常结束的进程自动补上。"""
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                children.clear()
+                return
+            if pid == 0:
+                return
+            children.discard(pid)
+            if not stopping:
+                print(f"!!! 工作进程 {pid} 意外退出 (状态 {status})，正在重新启动 !!!", flush=True)
+                time.sleep(1)
+                spawn()
+
+    def replace_workers():
+        """逐个替换工作进程：先 fork 一个带新数据的进程，再让一个旧进程退出，等它退出后处理下一个。"""
+        gc.collect()
+        gc.freeze()
+        for pid in list(children):
+            if stopping:
+                break
+            spawn()
+            children.discard(pid)
+            terminate(pid)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        print(f"--- 已用新数据替换全部 {len(children)} 个工作进程 ---", flush=True)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    print(f"--- 已启动 {workers} 个工作进程 (主进程 {os.getpid()})，"
+          f"监听 http://{sock.getsockname()[0]}:{sock.getsockname()[1]}/ ---", flush=True)
+
+    next_poll = time.monotonic() + ingestor.interval
+    while children:
+        reap()
+        if not stopping and time.monotonic() >= next_poll:
+            try:
+                if ingestor.poll():
+                    replace_workers()
+            except Exception as e:
+                print(f"!!! 增量导入出错: {e} !!!", flush=True)
+            next_poll = time.monotonic() + ingestor.interval
+        time.sleep(MASTER_TICK)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='以多个工作进程提供新闻主题仪表盘服务')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='工作进程数，默认取环境变量 NEWS_SERVER_WORKERS 或 CPU 核心数')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help='每个工作进程同时处理的请求数上限')
+    args = parser.parse_args()
+    workers = max(1, args.workers or default_workers())
+    threads = max(1, args.threads)
+
+    import final_result
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    final_result.prerender_default_wordclouds().join()
+
+    if not hasattr(os, 'fork'):
+        # Windows 没有 fork：退化为单进程多线程服务
+        print("!!! 当前平台不支持 fork，以单进程方式运行 !!!")
+        final_result.ingestor.start()
+        make_server(args.host, args.port, ConcurrencyLimit(final_result.app.server, threads),
+                    threaded=True).serve_forever()
+        sys.exit(0)
+
+    sock = socket.create_server((args.host, args.port), backlog=LISTEN_BACKLOG)
+    sock.set_inheritable(True)
+    # 把加载阶段产生的对象移出垃圾回收的扫描范围，工作进程中的 GC 不会改写这些对象而触发页面复制
+    gc.collect()
+    gc.freeze()
+    run_master(sock, final_result, workers, threads)
@@ -0,0 +1,127 @@
+# singleflight.py - 相同参数的并发回调合并为一次计算，结果在短时间内复用
+#
+# 页面首次加载的默认日期范围、同时打开的多个页面，都会在同一时刻发出参数完全相同的回调。
+# 同一进程内，第一个请求负责计算，计算期间到达的相同请求等待它的结果（合并）；
+# 算完的结果保留 ttl 秒，期间的相同请求直接返回（命中）。数据层替换后调用 clear_all() 作废全部结果。
+
+import time
+import threading
+import functools
+from collections import OrderedDict
+
+DEFAULT_TTL = 30.0
+DEFAULT_MAXSIZE = 256
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class _Call:
+    """一次进行中的计算，等待者通过 event 取得结果或异常。"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """按键合并并发计算的带 TTL 结果缓存，统计命中、合并与实际计算次数。"""
+
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        # clear() 后递增，之前开始的计算结果不再写入缓存
+        self._generation = 0
+        self._stats = {'requests': 0, 'hits': 0, 'coalesced': 0, 'computed': 0, 'errors': 0}
+
+    def do(self, key, compute):
+        """返回 key 对应的结果：缓存未过期时直接返回，已有相同计算在进行时等待其完成，否则调用 compute()。"""
+        with self._lock:
+            self._stats['requests'] += 1
+            entry = self._results.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._results.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self._stats['computed'] += 1
+                generation = self._generation
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is call:
+                    del self._inflight[key]
+                if call.error is not None:
+                    self._stats['errors'] += 1
+                elif generation == self._generation and self.ttl > 0:
+                    self._results[key] = (time.monotonic() + self.ttl, call.value)
+                    self._results.move_to_end(key)
+                    while len(self._results) > self.maxsize:
+                        self._results.popitem(last=False)
+            call.event.set()
+        return call.value
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._results.clear()
+            # 进行中的计算仍会返回给已在等待的请求，新请求则重新计算
+            self._inflight.clear()
+
+    def report(self):
+        """请求数、命中/合并/计算次数及命中率、合并率。"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached'] = len(self._results)
+        requests = stats['requests']
+        stats['hit_rate'] = round(stats['hits'] / requests, 4) if requests else 0.0
+        stats['coalesce_rate'] = round(stats['coalesced'] / requests, 4) if requests else 0.0
+        return stats
+
+
+def coalesced(key=None, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE):
+    """装饰器：参数相同（由 key(*args) 归一化）的调用经同一个 SingleFlight 合并。放在 @timed_callback 之下。"""
+    def decorator(func):
+        flight = SingleFlight(ttl, maxsize)
+        with _registry_lock:
+            _registry[func.__name__] = flight
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            return flight.do(key(*args) if key else args, lambda: func(*args))
+        wrapper.flight = flight
+        return wrapper
+    return decorator
+
+
+def clear_all():
+    """作废所有合并层中的缓存结果，数据层替换后调用。"""
+    with _registry_lock:
+        flights = list(_registry.values())
+    for flight in flights:
+        flight.clear()
+
+
+def coalescing_report():
+    with _registry_lock:
+        return {name: flight.report() for name, flight in _registry.items()}
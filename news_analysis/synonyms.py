@@ -0,0 +1,133 @@
+# synonyms.py - 按 matched_synonyms.txt 把同义词归并为标准词，作用于整数编码后的分词结果
+#
+# 文件每行形如 "标准词：X，出现的同义词：Y1, Y2"，即语料中出现的 Y1、Y2 统一计为 X。
+# 解析后的映射编译为两列保存在 cache/synonyms/，启动时直接读取，不再解析整份文本：
+#   words.json     - 映射涉及的全部词语
+#   canonical.npy  - words[i] 的标准词在 words 中的下标 (int32)，不需要归并的词指向自身
+#   meta.json      - 源文件大小/修改时间与规则版本，最后写入
+
+import os
+import json
+
+import numpy as np
+
+from preprocess import TokenizedCorpus, _atomic_save_npy
+
+SYNONYMS_PATH = 'matched_synonyms.txt'
+SYNONYM_CACHE_DIR = os.path.join('cache', 'synonyms')
+# 解析或归并规则有改动时递增此版本号，使编译好的映射表失效
+SYNONYM_RULE_VERSION = 1
+
+HEAD_PREFIX = '标准词：'
+SYNONYM_SEPARATOR = '，出现的同义词：'
+
+
+def parse_synonyms(path=SYNONYMS_PATH):
+    """解析同义词文件，返回 {同义词: 标准词}。
+
+    同一个同义词对应多个标准词时无法确定归属，不做归并；标准词本身又是其他行的同义词时沿链条归并到底，
+    成环时取环上字典序最小的词作为共同的标准词。
+    """
+    heads = {}
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith(HEAD_PREFIX) or SYNONYM_SEPARATOR not in line:
+                continue
+            head, synonyms = line[len(HEAD_PREFIX):].split(SYNONYM_SEPARATOR, 1)
+            for word in synonyms.split(','):
+                word = word.strip()
+                if word and word != head:
+                    heads.setdefault(word, set()).add(head)
+    direct = {word: next(iter(h)) for word, h in heads.items() if len(h) == 1}
+
+    resolved = {}
+    for word in direct:
+        path, current = [], word
+        while current in direct and current not in resolved and current not in path:
+            path.append(current)
+            current = direct[current]
+        if current in path:
+            target = min(path[path.index(current):])
+        else:
+            target = resolved.get(current, current)
+        for w in path:
+            resolved[w] = target
+    return {word: target for word, target in resolved.items() if word != target}
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return {'source': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'rule': SYNONYM_RULE_VERSION}
+
+
+def save_synonym_table(table, path=SYNONYMS_PATH, cache_dir=SYNONYM_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    words = list(dict.fromkeys(w for pair in table.items() for w in pair))
+    index = {w: i for i, w in enumerate(words)}
+    canonical = np.arange(len(words), dtype=np.int32)
+    for word, target in table.items():
+        canonical[index[word]] = index[target]
+    words_tmp = os.path.join(cache_dir, f"words.json.tmp-{os.getpid()}")
+    with open(words_tmp, 'w', encoding='utf-8') as f:
+        json.dump(words, f, ensure_ascii=False)
+    os.replace(words_tmp, os.path.join(cache_dir, 'words.json'))
+    _atomic_save_npy(os.path.join(cache_dir, 'canonical.npy'), canonical)
+    meta = dict(_source_signature(path), n_words=len(words))
+    meta_tmp = f"{meta_path}.tmp-{os.getpid()}"
+    with open(meta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(meta_tmp, meta_path)
+
+
+def _load_compiled_table(path, cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if any(meta.get(key) != value for key, value in _source_signature(path).items()):
+            return None
+        with open(os.path.join(cache_dir, 'words.json'), 'r', encoding='utf-8') as f:
+            words = json.load(f)
+        canonical = np.load(os.path.join(cache_dir, 'canonical.npy'))
+    except (OSError, ValueError):
+        return None
+    if len(words) != meta['n_words'] or len(canonical) != meta['n_words']:
+        return None
+    return {words[i]: words[j] for i, j in enumerate(canonical.tolist()) if i != j}
+
+
+def load_synonym_table(path=SYNONYMS_PATH, cache_dir=SYNONYM_CACHE_DIR):
+    """返回 {同义词: 标准词}；优先读取编译好的映射表，源文件有改动时重新解析并写回缓存。"""
+    table = _load_compiled_table(path, cache_dir)
+    if table is not None:
+        print(f"--- 已从 {cache_dir} 载入 {len(table)} 条同义词映射 ---")
+        return table
+    table = parse_synonyms(path)
+    try:
+        save_synonym_table(table, path, cache_dir)
+    except OSError as e:
+        print(f"!!! 写入同义词映射缓存失败: {e} !!!")
+    print(f"--- 已解析 {path}，共 {len(table)} 条同义词映射 ---")
+    return table
+
+
+def normalize_corpus(corpus, table):
+    """把语料中的同义词替换为标准词，返回新的 TokenizedCorpus。
+
+    只在词表上逐词查一次映射得到 词 ID -> 标准词 ID 的数组，整段词序列一次索引完成替换；
+    语料中没有出现过的标准词追加到词表末尾，原有词 ID 不变。
+    """
+    word_to_id = {w: i for i, w in enumerate(corpus.vocab)}
+    remap = np.arange(len(corpus.vocab), dtype=np.int32)
+    for i, word in enumerate(corpus.vocab):
+        target = table.get(word)
+        if target is not None:
+            remap[i] = word_to_id.setdefault(target, len(word_to_id))
+    if not len(remap) or np.array_equal(remap, np.arange(len(remap))):
+        return corpus
+    return TokenizedCorpus(list(word_to_id), corpus.offsets, remap[np.asarray(corpus.ids)], corpus.hashes,
+                           corpus.sentiment)
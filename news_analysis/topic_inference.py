@@ -0,0 +1,114 @@
+# topic_inference.py - 基于 lda_k3 模型的批量主题推断，为新导入的无标签新闻打标签
+#
+# 与 gensim LdaModel.inference 的变分 E 步相同，但一批文档一起做向量化迭代：
+# 词-主题矩阵 expElogbeta 以内存映射方式读取，每轮迭代只是若干次 numpy 运算。
+# classified_news_data_v2.json 中的 predicted_topic 即由 get_keywords 的分词结果经该模型得到，
+# 模型第 k 个主题对应 TOPIC_MAP 中的 id k+1。
+
+import threading
+
+import numpy as np
+from scipy import sparse
+from scipy.special import psi
+
+LDA_MODEL_PATH = 'lda_k3.model'
+LDA_DICT_PATH = 'lda_k3.dict'
+INFERENCE_BATCH_SIZE = 2048
+
+
+def dirichlet_expectation(alpha):
+    """E[log θ]，θ ~ Dir(alpha)，按行计算。"""
+    return psi(alpha) - psi(alpha.sum(axis=1, keepdims=True))
+
+
+class TopicInferencer:
+    """加载一次 LDA 模型，对已分词的文档批量推断主题分布。"""
+
+    def __init__(self, model_path=LDA_MODEL_PATH, dict_path=LDA_DICT_PATH):
+        from gensim.corpora import Dictionary
+        from gensim.models import LdaModel
+
+        model = LdaModel.load(model_path, mmap='r')
+        self.expElogbeta = model.expElogbeta
+        self.alpha = np.asarray(model.alpha, dtype=np.float64)
+        self.iterations = model.iterations
+        self.gamma_threshold = model.gamma_threshold
+        self.epsilon = np.finfo(model.dtype).eps
+        self.token2id = Dictionary.load(dict_path).token2id
+        self.num_topics = model.num_topics
+
+    def bow_matrix(self, docs):
+        """把分词后的文档转换为 (文档 × 词) 稀疏计数矩阵，模型词典外的词被忽略。"""
+        indptr = [0]
+        indices = []
+        for words in docs:
+            indices.extend(i for i in map(self.token2id.get, words) if i is not None)
+            indptr.append(len(indices))
+        bow = sparse.csr_matrix((np.ones(len(indices)), np.asarray(indices, dtype=np.int64), indptr),
+                                shape=(len(docs), len(self.token2id)))
+        bow.sum_duplicates()
+        return bow
+
+    def _infer_batch(self, bow):
+        n_docs = bow.shape[0]
+        gamma = np.ones((n_docs, self.num_topics))
+        # 以下变量只覆盖工作集中的文档；live 标记其中尚未收敛的文档，已收敛文档的 gamma 不再更新，
+        # 与逐篇迭代时各自提前结束一致。收敛的文档累计超过工作集的 1/5 时才压缩工作集，减少数组复制
+        docs = np.arange(n_docs)
+        live = np.ones(n_docs, dtype=bool)
+        lengths = np.diff(bow.indptr)
+        counts = bow.data
+        # 每个非零元素对应的词-主题权重 (nnz × K)，整批只从内存映射中取一次
+        beta = np.asarray(self.expElogbeta[:, bow.indices], dtype=np.float64).T
+        doc_gamma = gamma
+        exp_theta = np.exp(dirichlet_expectation(doc_gamma))
+        for _ in range(self.iterations):
+            indptr = np.concatenate([[0], np.cumsum(lengths)])
+            rows = np.repeat(np.arange(len(docs)), lengths)
+            phinorm = np.einsum('nk,nk->n', exp_theta[rows], beta) + self.epsilon
+            # 按文档汇总 counts/phinorm 加权的 beta，即一次稀疏矩阵乘法
+            spread = sparse.csr_matrix((counts / phinorm, np.arange(len(counts)), indptr),
+                                       shape=(len(docs), len(counts)))
+            new_gamma = self.alpha + exp_theta * (spread @ beta)
+            change = np.abs(new_gamma - doc_gamma).mean(axis=1)
+            doc_gamma = new_gamma
+            exp_theta = np.exp(dirichlet_expectation(doc_gamma))
+            gamma[docs[live]] = doc_gamma[live]
+
+            live &= change >= self.gamma_threshold
+            n_live = live.sum()
+            if n_live == 0:
+                break
+            if n_live * 5 < len(docs) * 4:
+                keep_nnz = np.repeat(live, lengths)
+                docs, doc_gamma, exp_theta, lengths = docs[live], doc_gamma[live], exp_theta[live], lengths[live]
+                counts, beta = counts[keep_nnz], beta[keep_nnz]
+                live = np.ones(len(docs), dtype=bool)
+        return gamma / gamma.sum(axis=1, keepdims=True)
+
+    def infer(self, docs, batch_size=INFERENCE_BATCH_SIZE):
+        """返回 (文档数 × 主题数) 的主题概率矩阵。"""
+        docs = list(docs)
+        if not docs:
+            return np.zeros((0, self.num_topics))
+        return np.vstack([self._infer_batch(self.bow_matrix(docs[i:i + batch_size]))
+                          for i in range(0, len(docs), batch_size)])
+
+    def classify(self, docs):
+        """返回每篇文档的 (topic_id, probability)，topic_id 从 1 开始，与 TOPIC_MAP 一致。"""
+        theta = self.infer(docs)
+        best = theta.argmax(axis=1)
+        return [(int(k) + 1, round(float(p), 4)) for k, p in zip(best, theta[np.arange(len(best)), best])]
+
+
+_inferencer = None
+_inferencer_lock = threading.Lock()
+
+
+def get_topic_inferencer():
+    """进程内共享的 TopicInferencer，首次使用时才加载模型。"""
+    global _inferencer
+    with _inferencer_lock:
+        if _inferencer is None:
+            _inferencer = TopicInferencer()
+        return _inferencer
@@ -0,0 +1,292 @@
+# wordcloud_render.py - 词云图渲染与渲染结果缓存
+
+import io
+import hashlib
+import threading
+from random import Random
+from operator import itemgetter
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageDraw, ImageFont
+from wordcloud import WordCloud
+from wordcloud.wordcloud import IntegralOccupancyMap
+
+from fonts import get_font
+
+WORDCLOUD_WIDTH = 800
+WORDCLOUD_HEIGHT = 500
+WORDCLOUD_MAX_WORDS = 100
+WORDCLOUD_CACHE_SIZE = 128
+# 固定随机种子，同一组词频与起始字号总是得到同一张图
+WORDCLOUD_RANDOM_STATE = 42
+
+# digest 为 PNG 字节的 SHA1 摘要
+WordCloudImage = namedtuple('WordCloudImage', ['digest', 'png'])
+
+
+class _FitProbe:
+    """传给 sample_position 的随机数源：总是取最后一个空位，只用来判断能否放下，不消耗真正的随机数。"""
+
+    @staticmethod
+    def randint(low, high):
+        return high
+
+
+_FIT_PROBE = _FitProbe()
+
+
+class SizedWordCloud(WordCloud):
+    """可指定起始字号、以二分查找缩小字号的 WordCloud。
+
+    原实现未指定 max_font_size 时每张图都先试放前两个词来确定起始字号；generate_from_frequencies 传入的
+    max_font_size 即作为起始字号，省去这一步，WordCloudCache 用它沿用整个日期范围的词云的起始字号。放置顺序、
+    方向与颜色的随机抽取与原实现相同，只是放不下时以 _find_position 的二分查找代替逐个字号重试。
+    原实现布局和绘制时每放置一个词、每缩小一次字号都重新读取一次字体文件，这里的布局与 to_image 都取
+    fonts.get_font 中缓存的字体对象。
+    """
+
+    def generate_from_frequencies(self, frequencies, max_font_size=None):
+        if self.mask is not None or self.repeat:
+            return super().generate_from_frequencies(frequencies, max_font_size)
+        frequencies = sorted(frequencies.items(), key=itemgetter(1), reverse=True)[:self.max_words]
+        if not frequencies:
+            raise ValueError("We need at least 1 word to plot a word cloud, got 0.")
+        max_frequency = float(frequencies[0][1])
+        frequencies = [(word, freq / max_frequency) for word, freq in frequencies]
+        random_state = self.random_state if self.random_state is not None else Random()
+
+        self.font_size_ = self._initial_font_size(frequencies, max_font_size, random_state)
+        self.words_ = dict(frequencies)
+        self.layout_ = self._place(frequencies, self.font_size_, random_state)
+        return self
+
+    def _place(self, frequencies, font_size, random_state):
+        """按词频从高到低依次放置，返回 WordCloud.layout_ 格式的布局。"""
+        occupancy = IntegralOccupancyMap(self.height, self.width, None)
+        img_grey = Image.new("L", (self.width, self.height))
+        draw = ImageDraw.Draw(img_grey)
+        layout = []
+        last_freq = 1.
+        for word, freq in frequencies:
+            if freq == 0:
+                continue
+            rs = self.relative_scaling
+            if rs != 0:
+                font_size = int(round((rs * (freq / float(last_freq)) + (1 - rs)) * font_size))
+            orientation = None if random_state.random() < self.prefer_horizontal else Image.ROTATE_90
+            found = self._find_position(draw, word, font_size, orientation, occupancy, random_state)
+            if found is None:
+                break
+
+            font_size, orientation, result = found
+            x, y = np.array(result) + self.margin // 2
+            draw.text((y, x), word, fill="white", font=self._font(font_size, orientation))
+            color = self.color_func(word, font_size=font_size, position=(x, y), orientation=orientation,
+                                    random_state=random_state, font_path=self.font_path)
+            layout.append(((word, freq), font_size, (x, y), orientation, color))
+            occupancy.update(np.asarray(img_grey), x, y)
+            last_freq = freq
+        return layout
+
+    def to_image(self):
+        self._check_generated()
+        if self.mask is not None:
+            return super().to_image()
+        img = Image.new(self.mode, (int(self.width * self.scale), int(self.height * self.scale)), self.background_color)
+        draw = ImageDraw.Draw(img)
+        for (word, _), font_size, position, orientation, color in self.layout_:
+            draw.text((int(position[1] * self.scale), int(position[0] * self.scale)), word, fill=color,
+                      font=self._font(int(font_size * self.scale), orientation))
+        return self._draw_contour(img=img)
+
+    def _find_position(self, draw, word, font_size, orientation, occupancy, random_state):
+        """按 WordCloud 的顺序寻找位置，返回 (字号, 方向, 位置)，字号缩到 min_font_size 仍放不下时返回 None。
+
+        原实现在原字号下先试随机方向、再试旋转，之后只按水平方向逐个字号减小重试，每次都要扫描整张积分图。
+        外框随字号单调变大，能否放下也随之单调，因此改用二分查找能放下的最大字号。query_integral_image
+        随机取到第 0 个空位时会误报放不下，原实现因此偶尔多缩小一号，这里对确实放得下的字号重新抽取位置。
+        """
+        if font_size < self.min_font_size:
+            return None
+        orientations = [orientation] if self.prefer_horizontal >= 1 else [orientation, Image.ROTATE_90]
+        for orientation in orientations:
+            result = occupancy.sample_position(*self._box_size(draw, word, font_size, orientation), random_state)
+            if result is not None:
+                return font_size, orientation, result
+
+        def fits(steps):
+            return occupancy.sample_position(*self._box_size(draw, word, font_size - steps * self.font_step, None),
+                                             _FIT_PROBE) is not None
+
+        low, high = 1, (font_size - self.min_font_size) // self.font_step
+        if high < low or not fits(high):
+            return None
+        while low < high:
+            mid = (low + high) // 2
+            if fits(mid):
+                high = mid
+            else:
+                low = mid + 1
+        font_size -= low * self.font_step
+        box = self._box_size(draw, word, font_size, None)
+        result = None
+        while result is None:
+            result = occupancy.sample_position(*box, random_state)
+        return font_size, None, result
+
+    def _box_size(self, draw, word, size, orientation):
+        box = draw.textbbox((0, 0), word, font=self._font(size, orientation), anchor="lt")
+        return box[3] + self.margin, box[2] + self.margin
+
+    def _font(self, size, orientation):
+        return ImageFont.TransposedFont(get_font(self.font_path, size), orientation=orientation)
+
+    def _initial_font_size(self, frequencies, max_font_size, random_state):
+        """与 WordCloud 相同：未指定最大字号时先只放前两个词，取两者字号的调和平均。"""
+        if max_font_size is None:
+            max_font_size = self.max_font_size
+        if max_font_size is not None:
+            return max_font_size
+        if len(frequencies) == 1:
+            return self.height
+        sizes = [entry[1] for entry in self._place(frequencies[:2], self.height, random_state)]
+        if len(sizes) < 2:
+            if not sizes:
+                raise ValueError("Couldn't find space to draw. Either the Canvas size is too small or too much "
+                                 "of the image is masked out.")
+            return sizes[0]
+        return int(2 * sizes[0] * sizes[1] / (sizes[0] + sizes[1]))
+
+
+def render_wordcloud_sized(frequencies, font_path, width=WORDCLOUD_WIDTH, height=WORDCLOUD_HEIGHT,
+                           max_words=WORDCLOUD_MAX_WORDS, font_size=None):
+    """按词频字典渲染透明背景词云，返回 (PNG 字节, 起始字号)；font_size 为空时按前两个词确定起始字号。"""
+    wc = SizedWordCloud(
+        font_path=font_path,
+        width=width,
+        height=height,
+        background_color=None,
+        mode="RGBA",
+        max_words=max_words,
+        collocations=False,
+        colormap='viridis',
+        prefer_horizontal=0.9,
+        relative_scaling=0.5,
+        random_state=WORDCLOUD_RANDOM_STATE
+    )
+    wc.generate_from_frequencies(frequencies, max_font_size=font_size)
+    img_buffer = io.BytesIO()
+    wc.to_image().save(img_buffer, format='PNG')
+    return img_buffer.getvalue(), wc.font_size_
+
+
+def render_wordcloud(frequencies, font_path, width=WORDCLOUD_WIDTH, height=WORDCLOUD_HEIGHT,
+                     max_words=WORDCLOUD_MAX_WORDS):
+    """按词频字典渲染透明背景词云，返回 PNG 字节。"""
+    return render_wordcloud_sized(frequencies, font_path, width, height, max_words)[0]
+
+
+class WordCloudCache:
+    """以 (日期窗口, 主题, 尺寸, 词数) 为键的词云图 LRU 缓存，超出容量时淘汰最久未使用的图片。
+
+    reuse_font_size 为真时，每个 (主题, 尺寸, 词数) 以整个日期范围的词云为锚点（锚点本身按前两个词确定起始字号），
+    其他窗口沿用锚点的起始字号。锚点只取决于数据层，同一窗口在任何进程、无论之前渲染过哪些窗口，得到的图片都相同，
+    按内容摘要寻址的 URL 在多个工作进程间依然有效。
+    """
+
+    def __init__(self, store, font_path, maxsize=WORDCLOUD_CACHE_SIZE, reuse_font_size=True):
+        self.store = store
+        self.font_path = font_path
+        self.maxsize = maxsize
+        self.reuse_font_size = reuse_font_size
+        self._images = OrderedDict()
+        self._by_digest = {}
+        # 锚点的起始字号：{整个日期范围的键: 字号}，随数据层一起作废
+        self._font_sizes = {}
+        self._lock = threading.Lock()
+        # 数据更新后递增，旧数据上正在进行的渲染结果不会再写入缓存
+        self._generation = 0
+
+    def reset(self, store):
+        """切换到新的数据层并清空已渲染的图片。"""
+        with self._lock:
+            self.store = store
+            self._generation += 1
+            self._images.clear()
+            self._by_digest.clear()
+            self._font_sizes.clear()
+
+    @staticmethod
+    def make_key(start_date, end_date, topic=None, width=WORDCLOUD_WIDTH, height=WORDCLOUD_HEIGHT,
+                 max_words=WORDCLOUD_MAX_WORDS):
+        start = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+        end = pd.Timestamp(end_date).strftime('%Y-%m-%d')
+        return (start, end, topic or None, width, height, max_words)
+
+    def get(self, start_date, end_date, topic=None, width=WORDCLOUD_WIDTH, height=WORDCLOUD_HEIGHT,
+            max_words=WORDCLOUD_MAX_WORDS):
+        """返回 WordCloudImage；窗口内没有任何关键词时返回 None。"""
+        key = self.make_key(start_date, end_date, topic, width, height, max_words)
+        with self._lock:
+            if key in self._images:
+                self._images.move_to_end(key)
+                return self._images[key]
+            store, generation = self.store, self._generation
+        anchor_key, font_size = self._anchor(store, key) if self.reuse_font_size else (None, None)
+        image, font_size = self._render(store, key, font_size)
+        with self._lock:
+            if generation != self._generation:
+                return image
+            if key == anchor_key and font_size is not None:
+                self._font_sizes[key] = font_size
+            self._images[key] = image
+            self._images.move_to_end(key)
+            if image is not None:
+                self._by_digest[image.digest] = image
+            while len(self._images) > self.maxsize:
+                _, evicted = self._images.popitem(last=False)
+                if evicted is not None and evicted not in self._images.values():
+                    self._by_digest.pop(evicted.digest, None)
+        return image
+
+    def by_digest(self, digest):
+        """按内容摘要查找仍在缓存中的图片，不存在时返回 None。"""
+        with self._lock:
+            return self._by_digest.get(digest)
+
+    def _anchor(self, store, key):
+        """返回 (锚点键, 锚点的起始字号)。key 本身即为锚点时字号为 None；锚点尚未渲染时先渲染它。"""
+        anchor_key = self.make_key(store.first_day, store.last_day, *key[2:])
+        if key == anchor_key:
+            return anchor_key, None
+        with self._lock:
+            font_size = self._font_sizes.get(anchor_key)
+        if font_size is None:
+            self.get(store.first_day, store.last_day, *key[2:])
+            with self._lock:
+                font_size = self._font_sizes.get(anchor_key)
+        return anchor_key, font_size
+
+    def _render(self, store, key, font_size=None):
+        start, end, topic, width, height, max_words = key
+        frequencies = store.top_terms(start, end, topic, k=max_words)
+        if not frequencies:
+            return None, None
+        png, font_size = render_wordcloud_sized(frequencies, self.font_path, width, height, max_words, font_size)
+        return WordCloudImage(hashlib.sha1(png).hexdigest(), png), font_size
+
+    def prerender(self, windows):
+        """在后台线程中依次渲染 (start_date, end_date, topic) 列表，返回该线程。"""
+        def worker():
+            for start_date, end_date, topic in windows:
+                try:
+                    self.get(start_date, end_date, topic)
+                except Exception as e:
+                    print(f"!!! 预渲染词云时出错: {e} !!!")
+            print(f"--- 已在后台预渲染 {len(windows)} 张词云图 ---")
+
+        thread = threading.Thread(target=worker, name='wordcloud-prerender', daemon=True)
+        thread.start()
+        return thread